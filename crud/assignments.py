@@ -1,5 +1,6 @@
 """Controller functions for clearance assignment operations."""
 
+import logging
 from typing import Optional
 from datetime import datetime
 from fastapi import APIRouter, Response, Depends, status
@@ -11,6 +12,7 @@ from models.clearance_assignment import ClearanceAssignment
 from models.clearance import Clearance
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 class ClearanceAssetRequestBody(BaseModel):
@@ -53,7 +55,8 @@ def get_assignments(response: Response,
         assignments = ClearanceAssignment.get_assignments_by_assignee(campus_id)
     except requests.ConnectTimeout:
         response.status_code = status.HTTP_408_REQUEST_TIMEOUT
-        print(f"CCure timeout. Could not get assignments for {campus_id}")
+        logger.error("CCure timeout. Could not get assignments for %s",
+                     campus_id)
         return {"assignments": []}
 
     all_assignments = []
@@ -67,7 +70,7 @@ def get_assignments(response: Response,
     else:
         assigner_email = jwt_payload.get("email", "")
         allowed_clearances = Clearance.get_allowed(assigner_email)
-        allowed_ids = [clearance.id for clearance in allowed_clearances]
+        allowed_ids = {clearance.id for clearance in allowed_clearances}
 
         for assignment in assignments:
             all_assignments.append({
@@ -101,9 +104,10 @@ def assign_clearances(response: Response,
         assign_ids = body.clearance_ids
     else:
         allowed_clearances = Clearance.get_allowed(assigner_email)
-        allowed_ids = [clearance.id for clearance in allowed_clearances]
-        assign_ids = [_id for _id in body.clearance_ids if _id in allowed_ids]
-        if len(assign_ids) != len(body.clearance_ids):
+        allowed_ids = {clearance.id for clearance in allowed_clearances}
+        assign_ids = body.clearance_ids
+        # stop at the first clearance the liaison can't assign
+        if any(_id not in allowed_ids for _id in assign_ids):
             response.status_code = status.HTTP_403_FORBIDDEN
             return {
                 "changes": 0,
@@ -144,9 +148,10 @@ def revoke_clearances(response: Response,
         revoke_ids = body.clearance_ids
     else:
         allowed_clearances = Clearance.get_allowed(assigner_email)
-        allowed_ids = [clearance.id for clearance in allowed_clearances]
-        revoke_ids = [_id for _id in body.clearance_ids if _id in allowed_ids]
-        if len(revoke_ids) != len(body.clearance_ids):
+        allowed_ids = {clearance.id for clearance in allowed_clearances}
+        revoke_ids = body.clearance_ids
+        # stop at the first clearance the liaison can't revoke
+        if any(_id not in allowed_ids for _id in revoke_ids):
             response.status_code = status.HTTP_403_FORBIDDEN
             return {
                 "changes": 0,
@@ -1,5 +1,6 @@
 """Controller functions for clearance-related operations"""
 
+import logging
 from typing import Optional
 from fastapi import APIRouter, Response, Depends, status
 import requests
@@ -8,6 +9,7 @@ from util.authorization import get_authorization, user_is_admin
 from models.clearance import Clearance
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 @router.get("", tags=["Clearance"],
@@ -29,8 +31,8 @@ def get_clearances(response: Response,
             clearances = Clearance.get(search)
         except requests.ConnectTimeout:
             response.status_code = status.HTTP_408_REQUEST_TIMEOUT
-            print(("CCure timeout. "
-                   f"Could not get clearances with search {search}"))
+            logger.error(("CCure timeout. "
+                          "Could not get clearances with search %s"), search)
             return {"clearance_names": []}
     else:
         email = jwt_payload.get("email", None)
@@ -48,7 +48,6 @@ def assign_liaison_permissions(response: Response,
     liaison = Personnel.find_one(campus_id=body.campus_id)
     record = liaison.assign_liaison_permissions(clearances)
 
-    del record["_id"]
     response.status_code = status.HTTP_200_OK
     return {"record": record}
 
@@ -66,6 +65,5 @@ def revoke_liaison_permissions(response: Response,
     liaison = Personnel.find_one(campus_id=body.campus_id)
     record = liaison.revoke_liaison_permissions(body.clearance_ids)
 
-    del record["_id"]
     response.status_code = status.HTTP_200_OK
     return {"record": record}
@@ -1,5 +1,6 @@
 """Controller functions for personnel operations"""
 
+import logging
 from typing import Optional
 from fastapi import APIRouter, Response, status, Depends
 import requests
@@ -7,6 +8,7 @@ from auth_checker import AuthChecker
 from models.personnel import Personnel
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 @router.get("", tags=["Personnel"],
@@ -22,13 +24,12 @@ def search_personnel(response: Response,
     try:
         personnel = Personnel.search(search)
     except requests.ConnectTimeout:
-        print(f"CCure timeout: Could not find personnel with search {search}")
+        logger.error("CCure timeout: Could not find personnel with search %s",
+                     search)
         response.status_code = status.HTTP_408_REQUEST_TIMEOUT
         return {"personnel": []}
 
-    results = []
-    for person in personnel:
-        results.append(person.__dict__)
+    results = [person.to_dict() for person in personnel]
 
     response.status_code = status.HTTP_200_OK
     return {"personnel": results}
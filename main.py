@@ -1,8 +1,10 @@
 """Backend service for Clearance Assignment functionality"""
 
+import logging
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
+from pymongo.errors import PyMongoError
 from crud.clearances import router as clearances_router
 from crud.assignments import router as assignments_router
 from crud.audit import router as audit_router
@@ -10,11 +12,14 @@ from crud.personnel import router as personnel_router
 from crud.liaison import router as liaison_router
 from models.scheduler_framework import ServiceScheduler
 from util.ccure_api import CcureApi
+from util.db_connect import create_indexes
 
 
 DESCRIPTION = """Backend service for Clearance Assignment functionality"""
 VERSION = "2023-04-21"
 
+logger = logging.getLogger(__name__)
+
 
 def create_app():
     """Set up a FastAPI application instance"""
@@ -58,7 +63,14 @@ def default(request: Request):
 
 @app.on_event("startup")
 def startup_db_client():
-    """Start the scheduler"""
+    """Create database indexes, log in to CCure and start the scheduler"""
+    try:
+        create_indexes()
+    except PyMongoError as err:
+        # the indexes only speed up queries, so start without them, and
+        # they're created on the next start that can reach Mongo
+        logger.error("Unable to create database indexes: %s", err)
+    CcureApi.warmup()
     scheduler = ServiceScheduler()
     scheduler.start_scheduler()
     print("Started scheduler")
@@ -70,3 +82,4 @@ def logout_ccure_session():
     response = CcureApi.logout()
     if response.get("success"):
         print("Ending CCure session")
+    CcureApi.close()
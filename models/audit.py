@@ -99,12 +99,14 @@ class Audit:
                 "$options": "i"  # case insensitive
             }
 
+        # $match and $sort must stay at the front of the pipeline so they
+        # can use the indexes from util.db_connect.create_indexes
         audit_results: list[dict] = cls.collection.aggregate([
             {"$match": match},
-            {"$project": {"_id": 0}},
             {"$sort": {"timestamp": -1}},
             {"$skip": skip},
-            {"$limit": limit}
-        ])
+            {"$limit": limit},
+            {"$project": {"_id": 0}}
+        ], allowDiskUse=False, batchSize=limit)
 
         return [Audit(**audit_record) for audit_record in audit_results]
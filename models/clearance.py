@@ -10,6 +10,8 @@ class Clearance:
     A collection of assets and permissions for when access to them
     is granted
     """
+    liaison_permissions_collection = get_clearance_collection(
+        "liaison-clearance-permissions")
 
     def __init__(self,
                  _id: str,
@@ -73,8 +75,9 @@ class Clearance:
             "name": clearance["Name"]
         } for clearance in clearances]
 
-    @staticmethod
-    def get_allowed(email: Optional[str] = None,
+    @classmethod
+    def get_allowed(cls,
+                    email: Optional[str] = None,
                     search: str = "") -> list["Clearance"]:
         """
         Get all clearances a liaison can assign
@@ -88,8 +91,7 @@ class Clearance:
         if not email:
             raise RuntimeError("An email address is required.")
 
-        collection = get_clearance_collection("liaison-clearance-permissions")
-        allowed_clearances = collection.aggregate([
+        allowed_clearances = cls.liaison_permissions_collection.aggregate([
             {
                 "$match": {"email": email}
             },
@@ -111,7 +113,7 @@ class Clearance:
                     }
                 }
             }
-        ])
+        ], batchSize=1000)
 
         return [Clearance(**clearance) for clearance in allowed_clearances]
 
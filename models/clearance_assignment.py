@@ -2,6 +2,8 @@
 
 from typing import Optional
 from datetime import datetime, date
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
 from fastapi import status
 from util.db_connect import get_clearance_collection
 from util.ccure_api import CcureApi
@@ -11,6 +13,7 @@ from .clearance import Clearance
 
 class ClearanceAssignment:
     """A record of a clearance being assigned to an individual"""
+    collection = get_clearance_collection("clearance_assignment")
 
     def __init__(self,
                  assigner_id: str = None,
@@ -98,28 +101,39 @@ class ClearanceAssignment:
         now = datetime.utcnow()
         assigner_id = CcureApi.get_campus_id_by_email(assigner_email)
         if start_time or end_time:  # then add it to mongo
-            new_assignments = []
-            for assignee_id in assignee_ids:
-                for clearance_id in clearance_guids:
-                    new_assignments.append({
-                        "assignee_id": assignee_id,
-                        "assigner_id": assigner_id,
-                        "clearance_id": clearance_id,
-                        "state": "assign-pending" if start_time else "active",
-                        "start_time": start_time,
-                        "end_time": end_time,
-                        "submitted_time": now
-                    })
-            assignment_collection = get_clearance_collection(
-                "clearance_assignment")
-            assignment_collection.insert_many(new_assignments)
+            state = "assign-pending" if start_time else "active"
+            # store clearance names with the assignments, so the scheduler
+            # can audit them without asking CCure
+            clearance_names = CcureApi.get_clearance_names(set(clearance_guids))
+            new_assignments = [{
+                "assignee_id": assignee_id,
+                "assigner_id": assigner_id,
+                "clearance_id": clearance_id,
+                "clearance_name": clearance_names.get(clearance_id, ""),
+                "state": state,
+                "start_time": start_time,
+                "end_time": end_time,
+                "submitted_time": now
+            } for assignee_id, clearance_id in product(assignee_ids,
+                                                       clearance_guids)]
+            # the documents are independent, so let the server insert them
+            # without preserving order or stopping at the first failure
+            cls.collection.insert_many(new_assignments, ordered=False)
 
         if start_time is None:  # then add it in CCure
+            # resolve every assignee's CCure ID in one request, so the
+            # lookups below are served from CcureApi's cache
+            CcureApi.get_person_object_ids(set(assignee_ids))
+            # look up everyone's current clearances concurrently
+            with ThreadPoolExecutor(
+                    max_workers=CcureApi.max_workers) as executor:
+                assignees_clearances = executor.map(
+                    cls.get_clearances_by_assignee, assignee_ids)
             new_assignments = []
-            for assignee_id in assignee_ids:
-                current_clearances = cls.get_clearances_by_assignee(assignee_id)
-                current_clearance_guids = [clearance.id
-                                           for clearance in current_clearances]
+            for assignee_id, current_clearances in zip(assignee_ids,
+                                                       assignees_clearances):
+                current_clearance_guids = {clearance.id
+                                           for clearance in current_clearances}
                 for clearance_id in clearance_guids:
                     if clearance_id not in current_clearance_guids:
                         new_assignments.append({
@@ -129,7 +143,8 @@ class ClearanceAssignment:
                         })
             clearances_data = CcureApi.assign_clearances(new_assignments)
 
-            # audit the new assignment
+            # audit the new assignments, leaving out clearances CCure
+            # doesn't know about, since those weren't sent
             Audit.add_many(audit_configs=[{
                 "assigner_id": new_assignment["assigner_id"],
                 "assignee_id": new_assignment["assignee_id"],
@@ -138,7 +153,8 @@ class ClearanceAssignment:
                     new_assignment["clearance_guid"]]["name"],
                 "timestamp": now,
                 "message": "Activating clearance"
-            } for new_assignment in new_assignments])
+            } for new_assignment in new_assignments
+                if new_assignment["clearance_guid"] in clearances_data])
 
         return len(assignee_ids) * len(clearance_guids)
 
@@ -156,19 +172,17 @@ class ClearanceAssignment:
 
         Returns: the number of changes made
         """
+        now = datetime.utcnow()
         assigner_id = CcureApi.get_campus_id_by_email(assigner_email)
-        new_assignments = []
-        for campus_id in assignee_ids:
-            for clearance_id in clearance_ids:
-                new_assignments.append({
-                    "assignee_id": campus_id,
-                    "assigner_id": assigner_id,
-                    "clearance_guid": clearance_id
-                })
+        new_assignments = [{
+            "assignee_id": campus_id,
+            "assigner_id": assigner_id,
+            "clearance_guid": clearance_id
+        } for campus_id, clearance_id in product(assignee_ids, clearance_ids)]
         clearances_data = CcureApi.revoke_clearances(new_assignments)
 
-        # audit the new revocation
-        now = datetime.utcnow()
+        # audit the new revocations, leaving out clearances CCure
+        # doesn't know about, since those weren't sent
         Audit.add_many(audit_configs=[{
             "assigner_id": new_assignment["assigner_id"],
             "assignee_id": new_assignment["assignee_id"],
@@ -177,5 +191,6 @@ class ClearanceAssignment:
                 new_assignment["clearance_guid"]]["name"],
             "timestamp": now,
             "message": "Revoking clearance"
-        } for new_assignment in new_assignments])
+        } for new_assignment in new_assignments
+            if new_assignment["clearance_guid"] in clearances_data])
         return len(assignee_ids) * len(clearance_ids)
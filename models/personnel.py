@@ -2,7 +2,7 @@
 
 from typing import Optional
 import datetime
-from util.db_connect import get_clearance_collection
+from pymongo import ReturnDocument
 from util.ccure_api import CcureApi
 from .clearance_assignment import ClearanceAssignment
 from .clearance import Clearance
@@ -10,6 +10,8 @@ from .clearance import Clearance
 
 class Personnel:
     """Any student, staff, or faculty member"""
+    liaison_permissions_collection = Clearance.liaison_permissions_collection
+    __slots__ = ("first_name", "middle_name", "last_name", "email", "campus_id")
 
     first_name: str
     middle_name: str
@@ -29,6 +31,10 @@ class Personnel:
         self.email = email
         self.campus_id = campus_id
 
+    def to_dict(self) -> dict:
+        """Return this person's fields as a dict"""
+        return {field: getattr(self, field) for field in self.__slots__}
+
     def get_full_name(self, use_middle_name: bool = False) -> str:
         """
         Return the full name of the person
@@ -37,15 +43,10 @@ class Personnel:
             use_middle_name: Whether or not to include the middle name
                 in the full name
         """
-
-        full_name = self.first_name
-
-        if use_middle_name and self.middle_name:
-            full_name += " " + self.middle_name
-
-        full_name += " " + self.last_name
-
-        return full_name.strip()
+        middle_name = self.middle_name if use_middle_name else None
+        return " ".join(name for name in (self.first_name,
+                                          middle_name,
+                                          self.last_name) if name)
 
     def clearances(self) -> list[str]:
         """Return a list of the clearance GUIDs assigned to this person"""
@@ -100,26 +101,18 @@ class Personnel:
         Parameters:
             clearance_ids: GUIDs for clearances this person can assign
         """
-        liaison_permissions_collection = get_clearance_collection(
-            "liaison-clearance-permissions")
-        record = liaison_permissions_collection.find_one({
-            "campus_id": self.campus_id})
-        if record is not None:
-            allowed_clearances = record.get("clearances")
-            for new_clearance in clearances:
-                if new_clearance not in allowed_clearances:
-                    allowed_clearances.append(new_clearance)
-            liaison_permissions_collection.update_one(
-                {"campus_id": self.campus_id},
-                {"$set": {"clearances": allowed_clearances}})
-        else:
-            record = {
-                "campus_id": self.campus_id,
-                "email": self.email,
-                "clearances": clearances
-            }
-            liaison_permissions_collection.insert_one(record)
-        return record
+        # add the clearances without duplicates in one atomic update,
+        # creating the liaison's record if they don't have one yet
+        return self.liaison_permissions_collection.find_one_and_update(
+            {"campus_id": self.campus_id},
+            {
+                "$addToSet": {"clearances": {"$each": clearances}},
+                "$setOnInsert": {"email": self.email}
+            },
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
 
     def revoke_liaison_permissions(self, clearance_guids: list[str]) -> dict:
         """
@@ -129,38 +122,34 @@ class Personnel:
             clearance_ids: GUIDs for clearances this person should
                 no longer be able to assign
         """
-        liaison_permissions_collection = get_clearance_collection(
-            "liaison-clearance-permissions")
-        record = liaison_permissions_collection.find_one({
-            "campus_id": self.campus_id})
-
-        if record is not None:
-            items_to_remove = []
-            allowed_clearances = record["clearances"] or []
-            for current_clearance in allowed_clearances:
-                if current_clearance["guid"] in clearance_guids:
-                    items_to_remove.append(current_clearance)
-            for item in items_to_remove:
-                allowed_clearances.remove(item)
-            liaison_permissions_collection.update_one(
-                {"campus_id": self.campus_id},
-                {"$set": {"clearances": allowed_clearances}})
-        else:
-            record = {
-                "campus_id": self.campus_id,
-                "email": self.email,
-                "clearances": []
-            }
-            liaison_permissions_collection.insert_one(record)
-
-        return record
+        # filter out the clearances in one atomic update, creating an empty
+        # record if the liaison doesn't have one yet
+        return self.liaison_permissions_collection.find_one_and_update(
+            {"campus_id": self.campus_id},
+            [{
+                "$set": {
+                    "email": {"$ifNull": ["$email", self.email]},
+                    "clearances": {
+                        "$filter": {
+                            "input": {"$ifNull": ["$clearances", []]},
+                            "cond": {
+                                "$not": {"$in": ["$$this.guid",
+                                                 clearance_guids]}
+                            }
+                        }
+                    }
+                }
+            }],
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
 
     def get_liaison_permissions(self) -> list["Clearance"]:
         """Fetch a list of clearances this person can assign"""
-        liaison_permissions_collection = get_clearance_collection(
-            "liaison-clearance-permissions")
-        record = liaison_permissions_collection.find_one({
-            "campus_id": self.campus_id})
+        record = self.liaison_permissions_collection.find_one(
+            {"campus_id": self.campus_id},
+            {"_id": 0, "clearances": 1})
         if record is None:
             return []
         return [Clearance(clearance.get("guid"),
@@ -180,14 +169,7 @@ class Personnel:
         """
         person_record = CcureApi.get_person_by_campus_id(campus_id)
         if person_record:
-            return Personnel(
-                person_record["FirstName"],
-                person_record["MiddleName"],
-                person_record["LastName"],
-                person_record["Text14"],  # email
-                person_record["Text1"]  # campus_id
-            )
-
+            return Personnel.from_record(person_record)
 
     @staticmethod
     def search(search: str) -> list["Personnel"]:
@@ -200,11 +182,23 @@ class Personnel:
 
         Returns: list of Personnel objects that match the search
         """
-        person_dicts = CcureApi.search_people(search)
-        return [Personnel(
-            person["FirstName"],
-            person["MiddleName"],
-            person["LastName"],
-            person["Text14"],  # email
-            person["Text1"]  # campus_id
-        ) for person in person_dicts]
+        return [Personnel.from_record(person_record)
+                for person_record in CcureApi.search_people(search)]
+
+    @staticmethod
+    def from_record(person_record: dict) -> "Personnel":
+        """
+        Create a Personnel object from a CCure Personnel record
+
+        Parameters:
+            person_record: the person's record from the CCure api
+
+        Returns: a Personnel object
+        """
+        return Personnel(
+            first_name=person_record["FirstName"],
+            middle_name=person_record["MiddleName"],
+            last_name=person_record["LastName"],
+            email=person_record["Text14"],
+            campus_id=person_record["Text1"]
+        )
@@ -35,7 +35,6 @@ class ServiceScheduler:
     def one_minute_jobs(self):
         """Add calls to jobs you want to run every minute"""
         SchedulerService.push_to_ccure()
-        SchedulerService.ccure_keepalive()
 
     def start_scheduler(self):
         """Schedule the jobs defined above"""
@@ -46,6 +45,11 @@ class ServiceScheduler:
         self.scheduler.add_job(self.one_minute_jobs,
                                'cron',
                                minute="*/1")
+        # a separate job, so a slow keepalive doesn't hold up pushing
+        # assignments to CCure, or the other way around
+        self.scheduler.add_job(SchedulerService.ccure_keepalive,
+                               'cron',
+                               minute="*/1")
         self.scheduler.add_job(self.hourly_jobs,
                                'cron',
                                minute="0")
@@ -1,15 +1,29 @@
 """Module containing SchedulerService, handling scheduled tasks"""
 
+import logging
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 import requests
+from pymongo import DeleteMany, UpdateMany
 from util.db_connect import get_clearance_collection
 from util.ccure_api import CcureApi
 from .audit import Audit
 
+logger = logging.getLogger(__name__)
+
 
 class SchedulerService:
     """Class to handle tasks scheduled in the ServiceScheduler"""
     clearance_assignment = get_clearance_collection("clearance_assignment")
+    delete_batch_size = 1000
+    # the state each category of assignment gets once pushed to CCure
+    pushed_states = {
+        "temporary_active_assignments": "active",
+        "revoked_assignments": "revoke-pushed",
+        "indefinite_active_assignments": "assign-pushed",
+        "expired_active_assignments": "assign-pushed"
+    }
 
     @classmethod
     def get_clearance_assignments(cls) -> dict:
@@ -26,91 +40,113 @@ class SchedulerService:
 
         Returns: a dict mapping document categories to lists of documents
         """
-        now = datetime.utcnow()
-        all_assignments = cls.clearance_assignment.aggregate([
-            {
-                "$facet": {
-                    "indefinite_active_assignments": [
-                        {
-                            "$match": {
-                                "state": "assign-pending",
-                                "end_time": None,
-                                "$or": [
-                                    {"start_time": None},
-                                    {"start_time": {"$lte": now}},
-                                ]
-                            }
-                        },
-                        {
-                            "$project": {
-                                "assignee_id": 1,
-                                "assigner_id": 1,
-                                "clearance_id": 1,
-                                "message": "Activating clearance",
-                                "activate": "Y"
-                            }
-                        }
-                    ],
-                    "temporary_active_assignments": [
-                        {
-                            "$match": {
-                                "state": "assign-pending",
-                                "end_time": {"$gt": now},
-                                "$or": [
-                                    {"start_time": None},
-                                    {"start_time": {"$lte": now}}
-                                ]
-                            }
-                        },
-                        {
-                            "$project": {
-                                "assignee_id": 1,
-                                "assigner_id": 1,
-                                "clearance_id": 1,
-                                "message": "Activating clearance",
-                                "activate": "Y"
-                            }
-                        }
-                    ],
-                    "expired_active_assignments": [
-                        {
-                            "$match": {
-                                "state": {"$in": [
-                                    "active",
-                                    "assign-pending"
-                                ]},
-                                "end_time": {"$lte": now}
-                            }
-                        },
-                        {
-                            "$project": {
-                                "assignee_id": 1,
-                                "assigner_id": 1,
-                                "clearance_id": 1,
-                                "message": "Clearance is expired.",
-                                "activate": "N"
-                            }
-                        }
-                    ],
-                    "revoked_assignments": [
-                        {
-                            "$match": {"state": "revoke-pending"}
-                        },
-                        {
-                            "$project": {
-                                "assignee_id": 1,
-                                "assigner_id": 1,
-                                "clearance_id": 1,
-                                "submitted_time": 1,
-                                "message": "Revoking clearance",
-                                "activate": "N"
-                            }
-                        }
-                    ]
+        pipelines = cls.get_category_pipelines(datetime.utcnow())
+
+        def run_pipeline(pipeline: list[dict]) -> list[dict]:
+            return list(cls.clearance_assignment.aggregate(pipeline))
+
+        # each category's $match can use an index on its own, unlike the
+        # branches of a single $facet, so run them side by side
+        with ThreadPoolExecutor(max_workers=len(pipelines)) as executor:
+            results = executor.map(run_pipeline, pipelines.values())
+        return dict(zip(pipelines.keys(), results))
+
+    @staticmethod
+    def get_category_pipelines(now: datetime) -> dict:
+        """
+        Build the aggregation pipeline for each category of
+        clearance_assignment document processed by the scheduler
+
+        Parameters:
+            now: the time to compare start and end times against
+
+        Returns: a dict mapping document categories to pipelines
+        """
+        # $match must stay the first stage of each pipeline so it can use
+        # the clearance_assignment indexes from util.db_connect.create_indexes
+        return {
+            "indefinite_active_assignments": [
+                {
+                    "$match": {
+                        "state": "assign-pending",
+                        "end_time": None,
+                        "$or": [
+                            {"start_time": None},
+                            {"start_time": {"$lte": now}},
+                        ]
+                    }
+                },
+                {
+                    "$project": {
+                        "assignee_id": 1,
+                        "assigner_id": 1,
+                        "clearance_id": 1,
+                        "clearance_name": 1,
+                        "message": "Activating clearance",
+                        "activate": "Y"
+                    }
+                }
+            ],
+            "temporary_active_assignments": [
+                {
+                    "$match": {
+                        "state": "assign-pending",
+                        "end_time": {"$gt": now},
+                        "$or": [
+                            {"start_time": None},
+                            {"start_time": {"$lte": now}}
+                        ]
+                    }
+                },
+                {
+                    "$project": {
+                        "assignee_id": 1,
+                        "assigner_id": 1,
+                        "clearance_id": 1,
+                        "clearance_name": 1,
+                        "message": "Activating clearance",
+                        "activate": "Y"
+                    }
+                }
+            ],
+            "expired_active_assignments": [
+                {
+                    "$match": {
+                        "state": {"$in": [
+                            "active",
+                            "assign-pending"
+                        ]},
+                        "end_time": {"$lte": now}
+                    }
+                },
+                {
+                    "$project": {
+                        "assignee_id": 1,
+                        "assigner_id": 1,
+                        "clearance_id": 1,
+                        "clearance_name": 1,
+                        "message": "Clearance is expired.",
+                        "activate": "N"
+                    }
+                }
+            ],
+            "revoked_assignments": [
+                {
+                    "$match": {"state": "revoke-pending"}
+                },
+                {
+                    "$project": {
+                        "assignee_id": 1,
+                        "assigner_id": 1,
+                        "clearance_id": 1,
+                        "clearance_name": 1,
+                        "submitted_time": 1,
+                        "message": "Revoking clearance",
+                        "activate": "N"
+                    }
                 }
-            }
-        ])
-        return next(all_assignments)
+            ]
+        }
 
     @classmethod
     def push_to_ccure(cls):
@@ -119,75 +155,82 @@ class SchedulerService:
         """
         assignments_by_category = cls.get_clearance_assignments()
 
-        # delete clearance assignments that have been revoked
+        # delete clearance assignments that have been revoked. only the
+        # latest revoke request for each assignment matters, since it
+        # covers everything submitted before the earlier ones
+        latest_revokes = {}
         for revoke_request in assignments_by_category["revoked_assignments"]:
-            cls.clearance_assignment.delete_many({
-                "state": {"$in": [
-                    "active",
-                    "assign-pending",
-                    "assign-pushed"
-                ]},
-                "assignee_id": revoke_request["assignee_id"],
-                "clearance_id": revoke_request["clearance_id"],
-                "submitted_time": {"$lte": revoke_request["submitted_time"]}
-            })
-
-        new_assignments = []
-        for category in assignments_by_category:
-            for assignment in assignments_by_category[category]:
-                new_assignments.append({
+            key = (revoke_request["assignee_id"], revoke_request["clearance_id"])
+            submitted_time = revoke_request["submitted_time"]
+            if key not in latest_revokes or submitted_time > latest_revokes[key]:
+                latest_revokes[key] = submitted_time
+        revoked_deletes = [DeleteMany({
+            "state": {"$in": [
+                "active",
+                "assign-pending",
+                "assign-pushed"
+            ]},
+            "assignee_id": assignee_id,
+            "clearance_id": clearance_id,
+            "submitted_time": {"$lte": submitted_time}
+        }) for (assignee_id, clearance_id), submitted_time
+            in latest_revokes.items()]
+        if revoked_deletes:
+            cls.clearance_assignment.bulk_write(revoked_deletes, ordered=False)
+
+        # sort everything into CCure pushes and state updates in one pass.
+        # temporary active and indefinite active get pushed to CCure,
+        # expired and revoked get pulled from CCure
+        assign_configs = []
+        revoke_configs = []
+        ids_by_state = {}
+        for category, assignments in assignments_by_category.items():
+            pushed_ids = ids_by_state.setdefault(cls.pushed_states[category],
+                                                 [])
+            for assignment in assignments:
+                configs = (assign_configs if assignment["activate"] == "Y"
+                           else revoke_configs)
+                configs.append({
                     "assignee_id": assignment["assignee_id"],
                     "assigner_id": assignment["assigner_id"],
                     "clearance_guid": assignment["clearance_id"],
+                    "clearance_name": assignment.get("clearance_name"),
                     "message": assignment["message"],
                     "activate": assignment["activate"]
                 })
+                pushed_ids.append(assignment["_id"])
 
-        # temporary active and indefinite active get pushed to CCure
-        CcureApi.assign_clearances(
-            [assg for assg in new_assignments if assg["activate"] == "Y"]
-        )
-        # expired and revoked get pulled from CCure
-        CcureApi.revoke_clearances(
-            [assg for assg in new_assignments if assg["activate"] == "N"]
-        )
+        # assign before revoking, so a clearance that is both assigned and
+        # revoked in the same run always ends up revoked
+        assigned_clearances = CcureApi.assign_clearances(assign_configs)
+        revoked_clearances = CcureApi.revoke_clearances(revoke_configs)
 
-        # audit the changes
-        if new_assignments:
+        # audit the changes, with the clearance names stored on the
+        # assignments. older assignments without one fall back to the
+        # names from the CCure calls above
+        if assign_configs or revoke_configs:
             now = datetime.utcnow()
+            clearances_data = {**assigned_clearances, **revoked_clearances}
             Audit.add_many(audit_configs=[{
                 "assigner_id": new_assignment["assigner_id"],
                 "assignee_id": new_assignment["assignee_id"],
                 "clearance_id": new_assignment["clearance_guid"],
-                "clearance_name": CcureApi.get_clearance_name(
-                    new_assignment["clearance_guid"]),
+                "clearance_name": new_assignment["clearance_name"] or (
+                    clearances_data.get(new_assignment["clearance_guid"], {})
+                    .get("name", "")),
                 "timestamp": now,
                 "message": new_assignment["message"]
-            } for new_assignment in new_assignments])
-
-        # temporary assignments should have the state "active"
-        active_ids = [doc["_id"] for doc in
-                      assignments_by_category["temporary_active_assignments"]]
-        cls.clearance_assignment.update_many(
-            {"_id": {"$in": active_ids}},
-            {"$set": {"state": "active"}}
-        )
-        # revoke requests should have the state "revoke-pushed"
-        revoke_ids = [doc["_id"] for doc in
-                      assignments_by_category["revoked_assignments"]]
-        cls.clearance_assignment.update_many(
-            {"_id": {"$in": revoke_ids}},
-            {"$set": {"state": "revoke-pushed"}}
-        )
-        # all other assignments should have the state "assign-pushed", to be
-        # processed by the daily delete_old_assignments job
-        for category in ("indefinite_active_assignments",
-                         "expired_active_assignments"):
-            ids = [doc["_id"] for doc in assignments_by_category[category]]
-            cls.clearance_assignment.update_many(
-                {"_id": {"$in": ids}},
-                {"$set": {"state": "assign-pushed"}}
-            )
+            } for new_assignment in chain(assign_configs, revoke_configs)])
+
+        # temporary assignments should have the state "active", revoke
+        # requests "revoke-pushed", and all other assignments
+        # "assign-pushed", to be processed by the daily
+        # delete_old_assignments job
+        state_updates = [UpdateMany({"_id": {"$in": ids}},
+                                    {"$set": {"state": state}})
+                         for state, ids in ids_by_state.items() if ids]
+        if state_updates:
+            cls.clearance_assignment.bulk_write(state_updates, ordered=False)
 
     @staticmethod
     def ccure_keepalive():
@@ -195,7 +238,8 @@ class SchedulerService:
         try:
             CcureApi.session_keepalive()
         except requests.ConnectTimeout:
-            print("CCure timeout: Session keepalive call was not successful.")
+            logger.error(
+                "CCure timeout: Session keepalive call was not successful.")
 
     @classmethod
     def delete_old_assignments(cls):
@@ -204,6 +248,19 @@ class SchedulerService:
         the assignment has been pushed to CCure
         :returns None:
         """
-        cls.clearance_assignment.delete_many({
-            "state": {"$in": ["revoke-pushed", "assign-pushed"]}
-        })
+        # delete in batches of _ids, so one long delete doesn't hold up
+        # other writes to the collection
+        last_id = None
+        while True:
+            query = {"state": {"$in": ["revoke-pushed", "assign-pushed"]}}
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            ids = [doc["_id"] for doc in cls.clearance_assignment.find(
+                query, {"_id": 1}
+            ).sort("_id", 1).limit(cls.delete_batch_size)]
+            if not ids:
+                break
+            cls.clearance_assignment.delete_many({"_id": {"$in": ids}})
+            if len(ids) < cls.delete_batch_size:
+                break
+            last_id = ids[-1]
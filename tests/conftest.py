@@ -1,12 +1,77 @@
+from fastapi.testclient import TestClient
 from pymongo import MongoClient
 import pytest
+from auth_checker import AuthChecker
+from main import app
+from util import authorization
+from util.authorization import get_authorization
+from util.ccure_api import CcureApi
+from util.db_connect import create_indexes
+from tests.override_get_authorization import (
+    override_get_authorization, override_get_authorization_liaison)
 
-mongo_client = MongoClient('mongodb://localhost:27017')
+
+def pytest_sessionstart(session):
+    # Build the indexes once; clearing collections between tests keeps them
+    create_indexes()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def disable_auth_checker():
+    """Skip AuthChecker's token check for the whole test session"""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(AuthChecker, "check_authorization",
+                      lambda *_, **__: None)
+        yield
+
+
+@pytest.fixture(scope="session")
+def mongo_client():
+    """One MongoClient, and so one connection pool, for the whole session"""
+    client = MongoClient('mongodb://localhost:27017', maxPoolSize=10)
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def clearance_collection(mongo_client):
+    """Look up a collection in the clearance_service test database"""
+    return lambda collection_name: (
+        mongo_client.clearance_service[collection_name])
+
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    A TestClient for the app, shared by the whole test session, that
+    authorizes every request as an admin by default
+    """
+    # not used as a context manager, so the app's startup handler
+    # doesn't start the real scheduler during tests
+    app.dependency_overrides[get_authorization] = override_get_authorization
+    return TestClient(app)
+
+
+@pytest.fixture
+def as_liaison(client, monkeypatch):
+    """Authorize requests as a liaison for one test, then go back to admin"""
+    monkeypatch.setitem(app.dependency_overrides, get_authorization,
+                        override_get_authorization_liaison)
 
 
 @pytest.fixture(scope="function", autouse=True)
-def wipe_data():
+def wipe_data(mongo_client):
     # Clean up the database after each test
     yield
-    mongo_client.drop_database('clearance_service')
-    mongo_client.drop_database('db')
+    for db_name in ('clearance_service', 'db'):
+        database = mongo_client[db_name]
+        for collection_name in database.list_collection_names():
+            database[collection_name].delete_many({})
+    # and forget anything cached from it
+    with CcureApi.cache_lock:
+        CcureApi.person_object_ids.clear()
+        CcureApi.campus_ids_by_email.clear()
+        CcureApi.person_records.clear()
+        CcureApi.clearance_records.clear()
+    with authorization.verified_tokens_lock:
+        authorization.verified_tokens.clear()
@@ -4,9 +4,10 @@
 class MockResponse:
     """Mock a response object."""
 
-    def __init__(self, json_data, status_code):
+    def __init__(self, json_data, status_code, text=""):
         self.json_data = json_data
         self.status_code = status_code
+        self.text = text
 
     def json(self):
         """Returns the response data."""
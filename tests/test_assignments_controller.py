@@ -4,23 +4,13 @@ Tests for the assignments endpoints.
 
 import json
 from fastapi import Response
-from fastapi.testclient import TestClient
 import requests
-from pymongo import MongoClient
-from auth_checker import AuthChecker
-from main import app
+from models.audit import Audit
 from models.clearance_assignment import ClearanceAssignment
 from models.clearance import Clearance
-from util import db_connect
 from util.ccure_api import CcureApi
-from util.authorization import get_authorization
-from tests.override_get_authorization import (
-    override_get_authorization, override_get_authorization_liaison)
 
 
-client = TestClient(app)
-app.dependency_overrides[get_authorization] = override_get_authorization
-
 clearances = [
     {
         "id": "DECBB54E-4B22-4671-9FA7-F8F370D66A97",
@@ -44,6 +34,9 @@ clearances = [
     }
 ]
 
+clearance_names = {clearance["id"]: clearance["name"]
+                   for clearance in clearances}
+
 assigned_clearances = [
     {
         "id": "DECBB54E-4B22-4671-9FA7-F8F370D66A97",
@@ -58,17 +51,6 @@ assigned_clearances = [
 ]
 
 
-def mock_mongo_client(collection_name):
-    """Mock a MongoDB database"""
-    return MongoClient(
-        "mongodb://localhost:27017").clearance_service[collection_name]
-
-
-def mock_check_authorization(*_, **__):
-    """"Mock AuthChecker response"""
-    return None
-
-
 def mock_get_assignments_by_assignee(*_, **__):
     """Mock ClearanceAssignment.get_assignments_by_assignee"""
     return [
@@ -81,10 +63,20 @@ def mock_get_assignments_by_assignee(*_, **__):
 
 def mock_get_clearance_name(clearance_guid):
     """Mock getting a clearance name from a clearance ID"""
-    for clearance in clearances:
-        if clearance["id"] == clearance_guid:
-            return clearance["name"]
-    return ""
+    return clearance_names.get(clearance_guid, "")
+
+
+def mock_ccure_response(successful: list[str]) -> Response:
+    """Mock a CCure response, encoded once and reused for every call"""
+    response = Response()
+    response.headers = {"testing": True}
+    #pylint: disable=protected-access
+    response._content = json.dumps(
+        {"data": {
+            "successful": successful,
+            "failed": []
+        }}).encode("utf-8")
+    return response
 
 
 def mock_assign(_,
@@ -115,14 +107,12 @@ def mock_get_allowed(*_, **__):
     ]
 
 
-def test_get_assignments_as_admin(monkeypatch):
+def test_get_assignments_as_admin(monkeypatch, client, clearance_collection):
     """
     It should be able to get all active assignments for an individual.
     """
-    monkeypatch.setattr(db_connect, "get_clearance_collection",
-                        mock_mongo_client("clearance_assignment"))
-    monkeypatch.setattr(AuthChecker, "check_authorization",
-                        mock_check_authorization)
+    monkeypatch.setattr(ClearanceAssignment, "collection",
+                        clearance_collection("clearance_assignment"))
     monkeypatch.setattr(CcureApi, "get_clearance_name",
                         mock_get_clearance_name)
     monkeypatch.setattr(ClearanceAssignment, "get_assignments_by_assignee",
@@ -148,32 +138,19 @@ def test_get_assignments_as_admin(monkeypatch):
     }
 
 
-def test_assign_clearances_as_admin(monkeypatch):
+def test_assign_clearances_as_admin(monkeypatch, client, clearance_collection):
     """It should be able to assign clearances to an individual."""
-    def mock_request_post(*_, **__):
-        response = Response()
-        response.headers = {"testing": True}
-        #pylint: disable=protected-access
-        response._content = json.dumps(
-            {"data": {
-                "successful": raw_assignees,
-                "failed": []
-            }}).encode("utf-8")
-        return response
-
-    monkeypatch.setattr(db_connect,
-                        "get_clearance_collection",
-                        mock_mongo_client("clearance_assignment"))
-    monkeypatch.setattr(AuthChecker,
-                        "check_authorization",
-                        mock_check_authorization)
+    monkeypatch.setattr(ClearanceAssignment, "collection",
+                        clearance_collection("clearance_assignment"))
     monkeypatch.setattr(ClearanceAssignment, "assign", mock_assign)
-    monkeypatch.setattr(requests, "post", mock_request_post)
 
     raw_assignees = [
         "200103374",
         "200103375"
     ]
+    ccure_response = mock_ccure_response(raw_assignees)
+    monkeypatch.setattr(requests.Session, "post",
+                        lambda *_, **__: ccure_response)
     raw_clearance_ids = [
         "DECBB54E-4B22-4671-9FA7-F8F370D66A97",
         "75A1AE65-798B-49DA-BDAC-671732AB4794",
@@ -191,32 +168,19 @@ def test_assign_clearances_as_admin(monkeypatch):
     assert response.json() == {"changes": 8}
 
 
-def test_revoke_clearances_as_admin(monkeypatch):
+def test_revoke_clearances_as_admin(monkeypatch, client, clearance_collection):
     """It should be able to revoke clearances from an individual."""
-    def mock_request_post(*_, **__):
-        response = Response()
-        response.headers = {"testing": True}
-        #pylint: disable=protected-access
-        response._content = json.dumps(
-            {"data": {
-                "successful": raw_assignees,
-                "failed": []
-            }}).encode("utf-8")
-        return response
-
-    monkeypatch.setattr(db_connect,
-                        "get_clearance_collection",
-                        mock_mongo_client("clearance_assignment"))
-    monkeypatch.setattr(AuthChecker,
-                        "check_authorization",
-                        mock_check_authorization)
+    monkeypatch.setattr(ClearanceAssignment, "collection",
+                        clearance_collection("clearance_assignment"))
     monkeypatch.setattr(ClearanceAssignment, "revoke", mock_revoke)
-    monkeypatch.setattr(requests, "post", mock_request_post)
 
     raw_assignees = [
         "200103374",
         "200103375"
     ]
+    ccure_response = mock_ccure_response(raw_assignees)
+    monkeypatch.setattr(requests.Session, "post",
+                        lambda *_, **__: ccure_response)
     raw_clearance_ids = [
         "DECBB54E-4B22-4671-9FA7-F8F370D66A97",
         "75A1AE65-798B-49DA-BDAC-671732AB4794",
@@ -235,21 +199,18 @@ def test_revoke_clearances_as_admin(monkeypatch):
     assert response.json() == {"changes": 8}
 
 
-def test_get_assignments_as_liaison(monkeypatch):
+def test_get_assignments_as_liaison(monkeypatch, client, as_liaison,
+                                    clearance_collection):
     """
     It should be able to get all active assignments for an individual.
     """
-    monkeypatch.setattr(db_connect, "get_clearance_collection",
-                        mock_mongo_client("clearance_assignment"))
-    monkeypatch.setattr(AuthChecker, "check_authorization",
-                        mock_check_authorization)
+    monkeypatch.setattr(ClearanceAssignment, "collection",
+                        clearance_collection("clearance_assignment"))
     monkeypatch.setattr(CcureApi, "get_clearance_name",
                         mock_get_clearance_name)
     monkeypatch.setattr(ClearanceAssignment, "get_assignments_by_assignee",
                         mock_get_assignments_by_assignee)
     monkeypatch.setattr(Clearance, "get_allowed", mock_get_allowed)
-    app.dependency_overrides[get_authorization] = (
-        override_get_authorization_liaison)
 
     response = client.get("/assignments/200103374",
                           headers={"Authorization": "Bearer token"})
@@ -257,37 +218,22 @@ def test_get_assignments_as_liaison(monkeypatch):
     assert response.json() == {"assignments": assigned_clearances}
 
 
-def test_assign_clearances_as_liaison(monkeypatch):
+def test_assign_clearances_as_liaison(monkeypatch, client, as_liaison,
+                                      clearance_collection):
     """
     It should assign clearances if the liaison has permission for all
     selected clearances. If any selected clearances are not in the
     liaison's permissions, all assignments should fail with a 403.
     """
-    def mock_request_post(*_, **__):
-        response = Response()
-        response.headers = {"testing": True}
-        #pylint: disable=protected-access
-        response._content = json.dumps(
-            {"data": {
-                "successful": raw_assignees,
-                "failed": []
-            }}).encode("utf-8")
-        return response
-
-    monkeypatch.setattr(db_connect,
-                        "get_clearance_collection",
-                        mock_mongo_client("clearance_assignment"))
-    monkeypatch.setattr(AuthChecker,
-                        "check_authorization",
-                        mock_check_authorization)
+    monkeypatch.setattr(ClearanceAssignment, "collection",
+                        clearance_collection("clearance_assignment"))
     monkeypatch.setattr(ClearanceAssignment, "assign", mock_assign)
     monkeypatch.setattr(Clearance, "get_allowed", mock_get_allowed)
-    monkeypatch.setattr(requests, "post", mock_request_post)
-
-    app.dependency_overrides[get_authorization] = (
-        override_get_authorization_liaison)
 
     raw_assignees = ["200103374"]
+    ccure_response = mock_ccure_response(raw_assignees)
+    monkeypatch.setattr(requests.Session, "post",
+                        lambda *_, **__: ccure_response)
 
     # assign more clearances than the liaison has permissions for
     raw_clearance_ids = [
@@ -320,37 +266,22 @@ def test_assign_clearances_as_liaison(monkeypatch):
     assert response.json().get("changes") == 2
 
 
-def test_revoke_clearances_as_liaison(monkeypatch):
+def test_revoke_clearances_as_liaison(monkeypatch, client, as_liaison,
+                                      clearance_collection):
     """
     It should revoke clearances if the liaison has permission for all
     selected clearances. If any selected clearances are not in the
     liaison's permissions, all revocations should fail with a 403.
     """
-    def mock_request_post(*_, **__):
-        response = Response()
-        response.headers = {"testing": True}
-        #pylint: disable=protected-access
-        response._content = json.dumps(
-            {"data": {
-                "successful": raw_assignees,
-                "failed": []
-            }}).encode("utf-8")
-        return response
-
-    monkeypatch.setattr(db_connect,
-                        "get_clearance_collection",
-                        mock_mongo_client("clearance_assignment"))
-    monkeypatch.setattr(AuthChecker,
-                        "check_authorization",
-                        mock_check_authorization)
+    monkeypatch.setattr(ClearanceAssignment, "collection",
+                        clearance_collection("clearance_assignment"))
     monkeypatch.setattr(ClearanceAssignment, "revoke", mock_revoke)
     monkeypatch.setattr(Clearance, "get_allowed", mock_get_allowed)
-    monkeypatch.setattr(requests, "post", mock_request_post)
-
-    app.dependency_overrides[get_authorization] = (
-        override_get_authorization_liaison)
 
     raw_assignees = ["200103374"]
+    ccure_response = mock_ccure_response(raw_assignees)
+    monkeypatch.setattr(requests.Session, "post",
+                        lambda *_, **__: ccure_response)
 
     # revoke more clearances than the liaison has permissions for
     raw_clearance_ids = [
@@ -381,3 +312,63 @@ def test_revoke_clearances_as_liaison(monkeypatch):
                            })
     assert response.status_code == 200
     assert response.json().get("changes") == 2
+
+
+def test_assign_unknown_clearance(monkeypatch, client, clearance_collection):
+    """
+    It should still audit the clearances that were assigned when one of
+    the requested clearances doesn't exist in CCure.
+    """
+    audit_collection = clearance_collection("audit")
+    monkeypatch.setattr(Audit, "collection", audit_collection)
+    monkeypatch.setattr(CcureApi, "get_campus_id_by_email",
+                        lambda *_: "000101234")
+    monkeypatch.setattr(CcureApi, "get_person_object_ids",
+                        lambda *_: {})
+    monkeypatch.setattr(ClearanceAssignment, "get_clearances_by_assignee",
+                        lambda *_: [])
+    # CCure only knows about the first clearance
+    monkeypatch.setattr(CcureApi, "assign_clearances", lambda *_: {
+        clearances[0]["id"]: {"id": 6001, "name": clearances[0]["name"]}
+    })
+
+    response = client.post("/assignments/assign",
+                           headers={"Authorization": "Bearer token"},
+                           json={
+                               "assignees": ["200103374", "200103375"],
+                               "clearance_ids": [clearances[0]["id"],
+                                                 "unknown-clearance-guid"]
+                           })
+    assert response.status_code == 200
+    audit_records = list(audit_collection.find())
+    assert len(audit_records) == 2
+    assert {record["clearance_id"] for record in audit_records} == {
+        clearances[0]["id"]}
+
+
+def test_revoke_unknown_clearance(monkeypatch, client, clearance_collection):
+    """
+    It should still audit the clearances that were revoked when one of
+    the requested clearances doesn't exist in CCure.
+    """
+    audit_collection = clearance_collection("audit")
+    monkeypatch.setattr(Audit, "collection", audit_collection)
+    monkeypatch.setattr(CcureApi, "get_campus_id_by_email",
+                        lambda *_: "000101234")
+    # CCure only knows about the first clearance
+    monkeypatch.setattr(CcureApi, "revoke_clearances", lambda *_: {
+        clearances[0]["id"]: {"id": 6001, "name": clearances[0]["name"]}
+    })
+
+    response = client.post("/assignments/revoke",
+                           headers={"Authorization": "Bearer token"},
+                           json={
+                               "assignees": ["200103374", "200103375"],
+                               "clearance_ids": [clearances[0]["id"],
+                                                 "unknown-clearance-guid"]
+                           })
+    assert response.status_code == 200
+    audit_records = list(audit_collection.find())
+    assert len(audit_records) == 2
+    assert {record["clearance_id"] for record in audit_records} == {
+        clearances[0]["id"]}
@@ -1,35 +1,15 @@
 """Tests for the audit endpoints"""
 
 import bson
-from fastapi.testclient import TestClient
-from pymongo import MongoClient
-from auth_checker import AuthChecker
-from util import db_connect
-from main import app
-from util.authorization import get_authorization
-from tests.override_get_authorization import override_get_authorization
-
-
-client = TestClient(app)
-app.dependency_overrides[get_authorization] = override_get_authorization
+import pytest
+from models.audit import Audit
 
 
 class TestAuditController:
-    def mock_mongo_client(self, collection_name):
-        """Mock a MongoDB database"""
-        return MongoClient(
-            "mongodb://localhost:27017").clearance_service[collection_name]
-
-    def test_search_actions(self, monkeypatch):
-        """Tests the search_actions endpoint"""
-        monkeypatch.setattr(db_connect,
-                            "get_clearance_collection",
-                            self.mock_mongo_client)
-        monkeypatch.setattr(AuthChecker,
-                            "check_authorization",
-                            lambda *_, **__: None)
-
-        ca_collection = self.mock_mongo_client("audit")
+    @pytest.fixture
+    def audit_collection(self, clearance_collection):
+        """The audit collection, seeded with records for each test"""
+        ca_collection = clearance_collection("audit")
 
         audit_records = [
             {
@@ -42,36 +22,24 @@ class TestAuditController:
             }
         ]
 
-        ca_collection.insert_many(audit_records)
+        ca_collection.insert_many(audit_records, ordered=False)
+        return ca_collection
+
+    def test_search_actions(self, monkeypatch, client, audit_collection):
+        """Tests the search_actions endpoint"""
+        monkeypatch.setattr(Audit, "collection", audit_collection)
 
         response = client.get("/audit/",
                               headers={"Authorization": "Bearer token"})
 
         assert response.status_code == 200
 
-    def test_search_actions_by_assigner_pagination(self, monkeypatch):
+    def test_search_actions_by_assigner_pagination(self,
+                                                   monkeypatch,
+                                                   client,
+                                                   audit_collection):
         """Test the search_actions_by_assigner endpoint with pagination"""
-        monkeypatch.setattr(db_connect,
-                            "get_clearance_collection",
-                            self.mock_mongo_client)
-        monkeypatch.setattr(AuthChecker,
-                            "check_authorization",
-                            lambda *_, **__: None)
-
-        ca_collection = self.mock_mongo_client("audit")
-
-        audit_records = [
-            {
-                "_id": bson.ObjectId(),
-                "assigner_id": "test_assigner",
-                "assignee_id": "test_assignee",
-                "clearance_id": None,
-                "timestamp": 0,
-                "message": "test_message",
-            }
-        ]
-
-        ca_collection.insert_many(audit_records)
+        monkeypatch.setattr(Audit, "collection", audit_collection)
 
         response = client.get("/audit/?limit=1",
                               headers={"Authorization": "Bearer token"})
@@ -0,0 +1,52 @@
+"""Tests for the authorization middleware"""
+
+import time
+import jwt
+import pytest
+from util import authorization
+from util.authorization import get_authorization
+
+SECRET = "test-secret"
+
+
+@pytest.fixture(autouse=True)
+def jwt_secret(monkeypatch):
+    """Sign tests' tokens with a known secret and start with no cache"""
+    monkeypatch.setattr(authorization, "JWT_SECRET", SECRET)
+    authorization.verified_tokens.clear()
+    yield
+    authorization.verified_tokens.clear()
+
+
+def test_valid_token_is_cached(monkeypatch):
+    """A verified token should be accepted again without decoding it"""
+    payload = {"email": "test_user@test.edu", "exp": time.time() + 60}
+    token = jwt.encode(payload, SECRET, "HS256")
+    assert get_authorization(f"Bearer {token}")["email"] == payload["email"]
+
+    def mock_decode(*_, **__):
+        raise AssertionError("a cached token shouldn't be decoded again")
+    monkeypatch.setattr(jwt, "decode", mock_decode)
+    assert get_authorization(f"bearer {token}")["email"] == payload["email"]
+
+
+def test_expired_token_rejected_from_cache():
+    """A token cached before it expired should be rejected after it expires"""
+    payload = {"email": "test_user@test.edu", "exp": int(time.time()) - 10}
+    token = jwt.encode(payload, SECRET, "HS256")
+    # as if it had been verified and cached while it was still valid
+    authorization.verified_tokens[token] = payload
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        get_authorization(f"Bearer {token}")
+
+
+def test_bad_signature_not_cached():
+    """A token with a bad signature should never be cached"""
+    payload = {"email": "test_user@test.edu", "exp": time.time() + 60}
+    token = jwt.encode(payload, "another-secret", "HS256")
+
+    for _ in range(2):
+        with pytest.raises(jwt.InvalidSignatureError):
+            get_authorization(f"Bearer {token}")
+    assert token not in authorization.verified_tokens
@@ -0,0 +1,109 @@
+"""Tests for the CCure api helpers"""
+
+import pytest
+from util.ccure_api import CcureApi, escape_literal, in_clause
+from tests.mock_response import MockResponse
+
+
+def test_escape_literal():
+    """It should double single quotes and leave everything else alone"""
+    assert escape_literal("O'Brien") == "O''Brien"
+    assert escape_literal("''") == "''''"
+    assert escape_literal("jtchampi@ncsu.edu") == "jtchampi@ncsu.edu"
+    assert escape_literal(1234) == "1234"
+    assert escape_literal("") == ""
+
+
+def test_in_clause():
+    """It should leave ints bare and quote and escape everything else"""
+    assert in_clause("ObjectID", [5001, 5002]) == "ObjectID IN (5001, 5002)"
+    assert in_clause("Text1", ["001132808", "5002"]) == (
+        "Text1 IN ('001132808', '5002')")
+    assert in_clause("Name", ["O'Brien", 7]) == "Name IN ('O''Brien', 7)"
+    assert in_clause("Text1", (campus_id for campus_id in ["001"])) == (
+        "Text1 IN ('001')")
+
+
+def test_in_clause_without_values():
+    """It should refuse to build an IN condition with nothing in it"""
+    with pytest.raises(ValueError):
+        in_clause("Text1", [])
+
+
+def test_find_clearance_pairs(monkeypatch):
+    """It should only keep the pairs that were asked to be revoked"""
+    requests = []
+
+    def mock_post(_, json, **__):
+        requests.append(json)
+        # CCure returns every combination of the queried people and clearances
+        return MockResponse([
+            {"ObjectID": 1, "PersonnelID": 5001, "ClearanceID": 6001},
+            {"ObjectID": 2, "PersonnelID": 5001, "ClearanceID": 6002},
+            {"ObjectID": 3, "PersonnelID": 5002, "ClearanceID": 6001},
+            {"ObjectID": 4, "PersonnelID": 5002, "ClearanceID": 6002},
+        ], 200)
+    monkeypatch.setattr(CcureApi, "post", mock_post)
+
+    pairs = CcureApi.find_clearance_pairs({5001: [6001], 5002: [6002]})
+    assert pairs == {5001: [1], 5002: [4]}
+    assert requests[0]["PageSize"] == 0
+    assert requests[0]["WhereClause"] == (
+        "PersonnelID IN (5001, 5002) AND ClearanceID IN (6001, 6002)")
+
+
+def test_revoke_clearances_in_batches(monkeypatch):
+    """It should look up the pairs to revoke a batch of people at a time"""
+    campus_ids = [f"00{i:07}" for i in range(5)]
+    monkeypatch.setattr(CcureApi, "lookup_batch_size", 2)
+    monkeypatch.setattr(
+        CcureApi, "get_person_object_ids",
+        lambda ids: {campus_id: 5000 + int(campus_id) for campus_id in ids})
+    monkeypatch.setattr(
+        CcureApi, "get_clearance_data",
+        lambda guids: {guid: {"id": 6001, "name": "Clearance"}
+                       for guid in guids})
+    batches = []
+    monkeypatch.setattr(CcureApi, "find_clearance_pairs",
+                        lambda revocations: batches.append(revocations) or {})
+
+    CcureApi.revoke_clearances([{
+        "assignee_id": campus_id,
+        "clearance_guid": "guid"
+    } for campus_id in campus_ids])
+    assert sorted(len(batch) for batch in batches) == [1, 2, 2]
+    assert sorted(assignee for batch in batches for assignee in batch) == [
+        5000, 5001, 5002, 5003, 5004]
+
+
+def test_search_clearances_pages(monkeypatch):
+    """It should fetch every page of a clearance search"""
+    clearances = [{"GUID": f"guid-{i}", "Name": f"Clearance {i}"}
+                  for i in range(5)]
+    page_numbers = []
+
+    def mock_post(_, json, **__):
+        page_numbers.append(json["pageNumber"])
+        start = (json["pageNumber"] - 1) * json["pageSize"]
+        # CCure puts a count before the page of records
+        return MockResponse([{"TotalRowsInAllPages": len(clearances)}]
+                            + clearances[start:start + json["pageSize"]], 200)
+    monkeypatch.setattr(CcureApi, "post", mock_post)
+    monkeypatch.setattr(CcureApi, "clearance_page_size", 2)
+
+    assert CcureApi.search_clearances("Clearance") == clearances
+    assert page_numbers == [1, 2, 3]
+
+
+def test_get_clearances_by_id_skips_failed_batches(monkeypatch):
+    """It should leave out a batch CCure couldn't look up"""
+    responses = iter([
+        MockResponse([{"TotalRowsInAllPages": 1},
+                      {"ObjectID": 6001, "GUID": "guid-1"}], 200),
+        MockResponse(None, 500, "Internal Server Error"),
+    ])
+    monkeypatch.setattr(CcureApi, "post", lambda *_, **__: next(responses))
+    monkeypatch.setattr(CcureApi, "lookup_batch_size", 1)
+
+    assert CcureApi.get_clearances_by_id([6001, 6002]) == [
+        {"ObjectID": 6001, "GUID": "guid-1"}]
@@ -1,20 +1,14 @@
 """Tests for the clearance endpoints"""
 
-from http import client
-from fastapi.testclient import TestClient
-from pymongo import MongoClient
-from auth_checker import AuthChecker
+import pytest
 from main import app
 from models.clearance import Clearance
 from util.authorization import get_authorization
 from tests.override_get_authorization import (
     override_get_authorization, override_get_authorization_liaison)
-from util import db_connect
 from util.ccure_api import CcureApi
 
 
-client = TestClient(app)
-
 # Clearance data returned from CCure api
 clearances_response = [
     {
@@ -45,10 +39,10 @@ clearances_response = [
 ]
 
 # Clearance IDs allowed for liaison
-allowed_liaison_clearances = [
+allowed_liaison_clearances = {
     "00BC9D72-F88C-4763-92B4-C41B946827A4",
     "2C124A2A-5C4E-4B96-B0B2-D688CCB8CA6B"
-]
+}
 
 clean_clearances_full = []      # Clearances for admins
 clean_clearances_partial = []   # Clearances for liaisons
@@ -61,16 +55,13 @@ for clearance in clearances_response:
     clean_clearances_full.append(new_clearance)
     if new_clearance["id"] in allowed_liaison_clearances:
         clean_clearances_partial.append(new_clearance)
-
-
-def mock_mongo_client():
-    """Mock a MongoDB database"""
-    return MongoClient("mongodb://localhost:27017").db
-
-
-def mock_check_authorization(*_, **__):
-    """"Mock AuthChecker response"""
-    return None
+clearance_names = {clearance["id"]: clearance["name"]
+                   for clearance in clean_clearances_full}
+clearance_objects = [Clearance(
+    item["_id"],
+    item["ccure_id"],
+    item["clearance_name"]
+) for item in clearances_response]
 
 
 def mock_get_clearances(*_, **__):
@@ -80,78 +71,29 @@ def mock_get_clearances(*_, **__):
 
 def mock_clearance_get(*_, **__):
     """Mock the Clearance.get method"""
-    return [Clearance(
-        item["_id"],
-        item["ccure_id"],
-        item["clearance_name"]
-    ) for item in clearances_response]
+    return clearance_objects
 
 
 def mock_get_clearance_name(clearance_guid):
     """Mock getting a clearance name from a clearance ID"""
-    for clnce in clean_clearances_full:
-        if clnce["id"] == clearance_guid:
-            return clnce["name"]
-    return ""
+    return clearance_names.get(clearance_guid, "")
 
 
 def mock_get_allowed(*_, **__):
     """Mock getting clearances for liaisons"""
-    return [
-        {
-            "id": "00BC9D72-F88C-4763-92B4-C41B946827A4",
-            "ccure_id": 5000,
-            "name": "VRB-SAT-Module 1 B140 Software Developer-C2"
-        },
-        {
-            "id": "2C124A2A-5C4E-4B96-B0B2-D688CCB8CA6B",
-            "ccure_id": 5001,
-            "name": "VRB - Module 2 Student Suite"
-        },
-    ]
-
-
-def test_get_clearances_as_admin(monkeypatch):
-    """
-    It should be able to search for clearances as an admin and get a
-    full list returned.
-    """
-    app.dependency_overrides[get_authorization] = override_get_authorization
-
-    monkeypatch.setattr(AuthChecker,
-                        "check_authorization",
-                        mock_check_authorization)
-    monkeypatch.setattr(db_connect,
-                        "get_clearance_collection",
-                        mock_mongo_client)
-    monkeypatch.setattr(CcureApi,
-                        "get_clearance_name",
-                        mock_get_clearance_name)
-    monkeypatch.setattr(Clearance,
-                        "get",
-                        mock_clearance_get)
-
-    search_query = "VRB"
-    response = client.get(f"/clearances?search={search_query}",
-                          headers={"Authorization": "Bearer token"})
-    assert response.status_code == 200
-    assert response.json() == {"clearance_names": clean_clearances_full}
+    return clean_clearances_partial
 
 
-def test_get_clearances_as_liaison(monkeypatch):
+@pytest.mark.parametrize("override, expected_clearances", [
+    (override_get_authorization, clean_clearances_full),
+    (override_get_authorization_liaison, clean_clearances_partial)
+], ids=["admin", "liaison"])
+def test_get_clearances(monkeypatch, client, override, expected_clearances):
     """
-    It should be able to search for clearances as a liaison and get a
-    partial list with only the allowed clearances.
+    It should be able to search for clearances and get a full list as an
+    admin, or a partial list with only the allowed clearances as a liaison.
     """
-    app.dependency_overrides[
-        get_authorization] = override_get_authorization_liaison
-
-    monkeypatch.setattr(AuthChecker,
-                        "check_authorization",
-                        mock_check_authorization)
-    monkeypatch.setattr(db_connect,
-                        "get_clearance_collection",
-                        mock_mongo_client)
+    monkeypatch.setitem(app.dependency_overrides, get_authorization, override)
     monkeypatch.setattr(CcureApi,
                         "get_clearance_name",
                         mock_get_clearance_name)
@@ -166,4 +108,4 @@ def test_get_clearances_as_liaison(monkeypatch):
     response = client.get(f"/clearances?search={search_query}",
                           headers={"Authorization": "Bearer token"})
     assert response.status_code == 200
-    assert response.json() == {"clearance_names": clean_clearances_partial}
+    assert response.json() == {"clearance_names": expected_clearances}
@@ -0,0 +1,58 @@
+"""Tests for encoding CCure form data"""
+
+from util.encode_form_data import encode
+
+
+def test_encode_assignment():
+    """Encoding a PersistToContainer payload gives the same form as before"""
+    data = {
+        "type": "SoftwareHouse.NextGen.Common.SecurityObjects.Personnel",
+        "ID": 5001,
+        "Children": [{
+            "Type": ("SoftwareHouse.NextGen.Common"
+                     ".SecurityObjects.PersonnelClearancePair"),
+            "PropertyNames": ["PersonnelID", "ClearanceID"],
+            "PropertyValues": [5001, 6001]
+        }, {
+            "Type": ("SoftwareHouse.NextGen.Common"
+                     ".SecurityObjects.PersonnelClearancePair"),
+            "PropertyNames": ["PersonnelID", "ClearanceID"],
+            "PropertyValues": [5001, 6002]
+        }]
+    }
+    pair_type = ("SoftwareHouse.NextGen.Common"
+                 ".SecurityObjects.PersonnelClearancePair")
+    assert encode(data) == (
+        "type=SoftwareHouse.NextGen.Common.SecurityObjects.Personnel"
+        "&ID=5001"
+        f"&Children[0][Type]={pair_type}"
+        "&Children[0][PropertyNames][]=PersonnelID"
+        "&Children[0][PropertyNames][]=ClearanceID"
+        "&Children[0][PropertyValues][]=5001"
+        "&Children[0][PropertyValues][]=6001"
+        f"&Children[1][Type]={pair_type}"
+        "&Children[1][PropertyNames][]=PersonnelID"
+        "&Children[1][PropertyNames][]=ClearanceID"
+        "&Children[1][PropertyValues][]=5001"
+        "&Children[1][PropertyValues][]=6002"
+    )
+
+
+def test_encode_revocation():
+    """Encoding a RemoveFromContainer payload keeps entries in order"""
+    data = {
+        "type": "Personnel",
+        "ID": 5001,
+        "Children": [{"Type": "PersonnelClearancePair", "ID": 7001},
+                     {"Type": "PersonnelClearancePair", "ID": 7002}]
+    }
+    assert encode(data) == (
+        "type=Personnel&ID=5001"
+        "&Children[0][Type]=PersonnelClearancePair&Children[0][ID]=7001"
+        "&Children[1][Type]=PersonnelClearancePair&Children[1][ID]=7002"
+    )
+
+
+def test_encode_escapes_values():
+    """Characters with meaning in a form are escaped in values"""
+    assert encode({"Name": "a&b=c"}) == "Name=a%26b%3Dc"
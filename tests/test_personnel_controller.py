@@ -1,23 +1,9 @@
 """Tests for the personnel endpoints"""
 
-from fastapi.testclient import TestClient
-from auth_checker import AuthChecker
-from util.authorization import get_authorization
-from tests.override_get_authorization import override_get_authorization
 from models.personnel import Personnel
-from main import app
 
 
-app.dependency_overrides[get_authorization] = override_get_authorization
-client = TestClient(app)
-
-
-def mock_check_authorization(*_, **__):
-    """"Mock AuthChecker response"""
-    return None
-
-
-def test_search_personnel(monkeypatch):
+def test_search_personnel(monkeypatch, client):
     """It should be able to search for personnel."""
     def mock_search(*_):
         return [
@@ -37,8 +23,6 @@ def test_search_personnel(monkeypatch):
             ),
         ]
     monkeypatch.setattr(Personnel, "search", mock_search)
-    monkeypatch.setattr(AuthChecker, "check_authorization",
-                        mock_check_authorization)
 
     response = client.get("/personnel?search=marina",
                           headers={"Authorization": "Bearer token"})
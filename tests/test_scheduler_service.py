@@ -2,29 +2,19 @@
 
 from datetime import timedelta, datetime as dt
 import bson
-from pymongo import MongoClient
 from models.audit import Audit
 from models.scheduler_service import SchedulerService
-from util import db_connect
 from util.ccure_api import CcureApi
 
 
 class TestSchedulerService:
 
-    def mock_mongo_client(self, collection_name):
-        """Mock a MongoDB database"""
-        return MongoClient(
-            "mongodb://localhost:27017").clearance_service[collection_name]
-
-    def test_delete_old_assignments(self, monkeypatch):
+    def test_delete_old_assignments(self, monkeypatch, clearance_collection):
         """It should be able to delete old assignments."""
 
-        monkeypatch.setattr(db_connect,
-                            "get_clearance_collection",
-                            self.mock_mongo_client)
         monkeypatch.setattr(SchedulerService,
                             "clearance_assignment",
-                            self.mock_mongo_client("clearance_assignment"))
+                            clearance_collection("clearance_assignment"))
 
         old_assignments = [
             {
@@ -59,25 +49,23 @@ class TestSchedulerService:
             }
         ]
 
-        db_connect.get_clearance_collection(
+        clearance_collection(
             "clearance_assignment").insert_many(old_assignments)
 
         SchedulerService.delete_old_assignments()
 
-        assert db_connect.get_clearance_collection(
+        assert clearance_collection(
             "clearance_assignment").count_documents({}) == 1
 
         monkeypatch.undo()
 
-    def test_get_all_clearance_assignments(self, monkeypatch):
+    def test_get_all_clearance_assignments(self, monkeypatch,
+                                           clearance_collection):
         """It should be able to get all clearance assignments."""
 
-        monkeypatch.setattr(db_connect,
-                            "get_clearance_collection",
-                            self.mock_mongo_client)
         monkeypatch.setattr(SchedulerService,
                             "clearance_assignment",
-                            self.mock_mongo_client("clearance_assignment"))
+                            clearance_collection("clearance_assignment"))
 
         assignments = [
             {
@@ -172,7 +160,7 @@ class TestSchedulerService:
             }
         ]
 
-        db_connect.get_clearance_collection(
+        clearance_collection(
             "clearance_assignment").insert_many(assignments)
 
         results = SchedulerService.get_clearance_assignments()
@@ -188,18 +176,16 @@ class TestSchedulerService:
 
         monkeypatch.undo()
 
-    def test_future_active_clearance_assignments(self, monkeypatch):
+    def test_future_active_clearance_assignments(self, monkeypatch,
+                                                 clearance_collection):
         """
         It should not push Clearance Assignments that are 'assign-pending'
         and have a start_time in the future.
         """
 
-        monkeypatch.setattr(db_connect,
-                            "get_clearance_collection",
-                            self.mock_mongo_client)
         monkeypatch.setattr(SchedulerService,
                             "clearance_assignment",
-                            self.mock_mongo_client("clearance_assignment"))
+                            clearance_collection("clearance_assignment"))
 
         assignment = {
             "_id": bson.ObjectId(),
@@ -212,7 +198,7 @@ class TestSchedulerService:
             "submitted_time": 0,
         }
 
-        db_connect.get_clearance_collection(
+        clearance_collection(
             "clearance_assignment").insert_one(assignment)
 
         results = SchedulerService.get_clearance_assignments()
@@ -228,33 +214,50 @@ class TestSchedulerService:
 
         monkeypatch.undo()
 
-    def test_temporary_assignments(self, monkeypatch):
+    def test_category_pipelines_use_indexes(self, monkeypatch,
+                                            clearance_collection):
+        """
+        Each category's pipeline should start with a $match that can use
+        an index instead of scanning the whole collection.
+        """
+
+        monkeypatch.setattr(SchedulerService,
+                            "clearance_assignment",
+                            clearance_collection("clearance_assignment"))
+
+        collection = SchedulerService.clearance_assignment
+        pipelines = SchedulerService.get_category_pipelines(dt.utcnow())
+        for category, pipeline in pipelines.items():
+            assert "$match" in pipeline[0], category
+            explanation = str(collection.database.command(
+                "aggregate", collection.name,
+                pipeline=pipeline, explain=True))
+            assert "IXSCAN" in explanation, category
+            assert "COLLSCAN" not in explanation, category
+
+        monkeypatch.undo()
+
+    def test_temporary_assignments(self, monkeypatch, clearance_collection):
         """
         It should push to CCure, create a document in the audit collection,
         and update the state to "active" for clearance assignments that are
         'assign-pending', not before start date, and a future end date
         """
 
-        monkeypatch.setattr(db_connect,
-                            "get_clearance_collection",
-                            self.mock_mongo_client)
         monkeypatch.setattr(SchedulerService,
                             "clearance_assignment",
-                            self.mock_mongo_client("clearance_assignment"))
+                            clearance_collection("clearance_assignment"))
         monkeypatch.setattr(Audit,
                             "collection",
-                            self.mock_mongo_client("audit"))
+                            clearance_collection("audit"))
         monkeypatch.setattr(CcureApi,
                             "assign_clearances",
-                            lambda *_, **__: None)
+                            lambda *_, **__: {})
         monkeypatch.setattr(CcureApi,
                             "revoke_clearances",
-                            lambda *_, **__: None)
-        monkeypatch.setattr(CcureApi,
-                            "get_person_by_campus_id",
                             lambda *_, **__: {})
         monkeypatch.setattr(CcureApi,
-                            "get_clearance_by_guid",
+                            "get_person_by_campus_id",
                             lambda *_, **__: {})
 
         assignment = {
@@ -268,7 +271,7 @@ class TestSchedulerService:
             "submitted_time": dt.now().timestamp()
         }
 
-        db_connect.get_clearance_collection(
+        clearance_collection(
             "clearance_assignment").insert_one(assignment)
 
         # test that the new assignment is categorized correctly
@@ -286,11 +289,11 @@ class TestSchedulerService:
         SchedulerService.push_to_ccure()
 
         # test that the state has changed and the assignment has been audited
-        audit_result = db_connect.get_clearance_collection(
+        audit_result = clearance_collection(
             "audit").find_one({})
         assert audit_result is not None
 
-        new_ca_record = db_connect.get_clearance_collection(
+        new_ca_record = clearance_collection(
             "clearance_assignment").find_one({})
         assert new_ca_record.get("state") == "active"
 
@@ -1,14 +1,35 @@
 """Module representing authorization middleware"""
 
 import os
+import time
+import threading
 import jwt
+from cachetools import TTLCache
 from fastapi import Header
 
+JWT_SECRET = os.getenv("JWT_SECRET")
+# token -> verified payload, so repeat requests skip signature checks
+verified_tokens = TTLCache(maxsize=1024, ttl=30)
+verified_tokens_lock = threading.Lock()
+
 
 def get_authorization(authorization: str = Header(default=None)):
     """Middleware to extract authorization details out of the token"""
-    token = authorization.split(" ")[1]
-    payload = jwt.decode(token, os.getenv("JWT_SECRET"), ["HS256"])
+    # the auth scheme is case insensitive
+    if authorization and authorization[:7].lower() == "bearer ":
+        token = authorization[7:]
+    else:
+        token = (authorization or "").strip()
+
+    with verified_tokens_lock:
+        payload = verified_tokens.get(token)
+    # a cached token still has to be within its expiration time
+    if payload is not None and payload.get("exp", float("inf")) > time.time():
+        return payload
+
+    payload = jwt.decode(token, JWT_SECRET, ["HS256"])
+    with verified_tokens_lock:
+        verified_tokens[token] = payload
     return payload
 
 
@@ -1,18 +1,142 @@
 """Handle common interactions with the CCure api"""
 
 import os
-from typing import Optional
+import logging
+import threading
+from collections import defaultdict
+from itertools import count
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+from cachetools import TTLCache
 from fastapi import status
 from pydantic import BaseModel
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from .encode_form_data import encode
 
+logger = logging.getLogger(__name__)
+
+
+def escape_literal(value: str) -> str:
+    """
+    Escape a value so it can be placed inside a quoted string literal
+    in a CCure WhereClause
+
+    Parameters:
+        value: the raw value, such as a search term
+
+    Returns: the value with single quotes doubled
+    """
+    return str(value).replace("'", "''")
+
+
+def in_clause(column: str, values: Iterable) -> str:
+    """
+    Build a CCure WhereClause condition matching any of the given values
+
+    Parameters:
+        column: the CCure property to match, such as Text1 or ObjectID
+        values: the values to match. Numbers are used as they are,
+            anything else is quoted and escaped.
+
+    Returns: the condition, such as "Text1 IN ('001', '002')"
+    """
+    value_list = ", ".join(
+        str(value) if isinstance(value, int) else f"'{escape_literal(value)}'"
+        for value in values)
+    if not value_list:  # CCure rejects an empty IN list
+        raise ValueError(f"No values to match {column} against")
+    return f"{column} IN ({value_list})"
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    """
+    Split items into lists of at most size items
+
+    Parameters:
+        items: the items to split up
+        size: the most items to put in one list
+
+    Returns: an iterator over the lists of items
+    """
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
 
 class CcureApi:
     """Class for managing interactions with the CCure api"""
 
     base_url = os.getenv("CCURE_BASE_URL")
+    login_data = {
+        "UserName": os.getenv("CCURE_USERNAME"),
+        "Password": os.getenv("CCURE_PASSWORD"),
+        "ClientName": os.getenv("CCURE_CLIENT_NAME"),
+        "ClientVersion": os.getenv("CCURE_CLIENT_VERSION"),
+        "ClientID": os.getenv("CCURE_CLIENT_ID")
+    }
     session_id = None
+    search_page_size = 100
+    clearance_page_size = 500  # clearances to fetch per page of a search
+    max_workers = 8  # concurrent requests allowed to CCure at once
+    lookup_batch_size = 100  # most values to put in one WhereClause IN list
+    timeout = (3.05, 30)  # seconds to connect, seconds to read
+    bulk_timeout = (3.05, 60)  # for assign and revoke requests
+    http_session = None
+    form_headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    # shared by every PersonnelClearancePair created in assign requests
+    pair_property_names = ["PersonnelID", "ClearanceID"]
+    # the fields every ClearancesForAssignment request shares
+    clearance_query = {
+        "partitionList": [],
+        "pageSize": 0,
+        "pageNumber": 1,
+        "sortColumnName": "",
+        "whereArgList": [],
+        "propertyList": ["Name"],
+        "explicitPropertyList": []
+    }
+    # campus ID -> CCure ObjectID, and email -> campus ID
+    person_object_ids = TTLCache(maxsize=4096, ttl=300)
+    campus_ids_by_email = TTLCache(maxsize=1024, ttl=300)
+    person_records = TTLCache(maxsize=4096, ttl=30)  # campus ID -> record
+    # clearance GUID -> CCure ID and name, which rarely change
+    clearance_records = TTLCache(maxsize=4096, ttl=300)
+    cache_lock = threading.Lock()
+    session_lock = threading.Lock()  # held while logging in to CCure
+
+    @classmethod
+    def get_http_session(cls) -> requests.Session:
+        """
+        Get the requests session shared by every call to the CCure api,
+        so connections to CCure are kept alive and reused
+
+        Returns: the shared requests.Session
+        """
+        if cls.http_session is None:
+            cls.http_session = requests.Session()
+            cls.http_session.headers.update({
+                "Access-Control-Expose-Headers": "session-id"
+            })
+            # keep enough pooled connections for max_workers concurrent
+            # requests plus the scheduler's calls
+            adapter = HTTPAdapter(
+                pool_maxsize=cls.max_workers * 2,
+                max_retries=Retry(total=3,
+                                  # a read error, 502 or 504 may mean CCure
+                                  # already applied a write, so only resend
+                                  # requests it says it turned away
+                                  read=0,
+                                  backoff_factor=0.2,
+                                  status_forcelist=[429, 503],
+                                  # every CCure call is a POST, which urllib3
+                                  # never retries on a status by default
+                                  allowed_methods=["POST"],
+                                  raise_on_status=False))
+            cls.http_session.mount("http://", adapter)
+            cls.http_session.mount("https://", adapter)
+        return cls.http_session
 
     @classmethod
     def get_session_id(cls) -> str:
@@ -22,21 +146,68 @@ class CcureApi:
         Returns: the session_id
         """
         if cls.session_id is None:
-            login_route = "/victorwebservice/api/Authenticate/Login"
-            response = requests.post(
-                cls.base_url + login_route,
-                data={
-                    "UserName": os.getenv("CCURE_USERNAME"),
-                    "Password": os.getenv("CCURE_PASSWORD"),
-                    "ClientName": os.getenv("CCURE_CLIENT_NAME"),
-                    "ClientVersion": os.getenv("CCURE_CLIENT_VERSION"),
-                    "ClientID": os.getenv("CCURE_CLIENT_ID")
-                },
-                timeout=1
-            )
-            cls.session_id = response.headers["session-id"]
+            with cls.session_lock:
+                # another thread may have logged in while this one waited
+                if cls.session_id is None:
+                    login_route = "/victorwebservice/api/Authenticate/Login"
+                    http_session = cls.get_http_session()
+                    response = http_session.post(
+                        cls.base_url + login_route,
+                        data=cls.login_data,
+                        timeout=cls.timeout
+                    )
+                    # fail loudly rather than with a missing session-id
+                    response.raise_for_status()
+                    http_session.headers["session-id"] = (
+                        response.headers["session-id"])
+                    cls.session_id = response.headers["session-id"]
         return cls.session_id
 
+    @classmethod
+    def warmup(cls):
+        """
+        Log in to CCure ahead of the first request, so that request
+        doesn't wait for the login or a new connection
+        """
+        if not cls.base_url:
+            logger.warning("CCURE_BASE_URL is not set, "
+                           "skipping the CCure login at startup")
+            return
+        try:
+            cls.get_session_id()
+        except Exception as err:  # pylint: disable=broad-except
+            # a bad CCURE_BASE_URL or login raises more than RequestException,
+            # and neither should stop the app. the first request will try to
+            # log in again
+            logger.warning("Unable to log in to CCure at startup: %r", err)
+
+    @classmethod
+    def post(cls, route: str, **kwargs) -> requests.Response:
+        """
+        Send a POST request to the CCure api over the shared session.
+        If CCure rejects the session id, log in again and retry once.
+
+        Parameters:
+            route: the api route, relative to base_url
+            kwargs: any other arguments for requests, such as json or data.
+                timeout defaults to CcureApi.timeout.
+
+        Returns: the response from CCure
+        """
+        kwargs.setdefault("timeout", cls.timeout)
+        session_id = cls.get_session_id()
+        response = cls.get_http_session().post(cls.base_url + route, **kwargs)
+        if response.status_code == status.HTTP_401_UNAUTHORIZED:
+            with cls.session_lock:
+                # only the first request to find the session expired
+                # throws it away; the rest reuse the new one
+                if cls.session_id == session_id:
+                    cls.session_id = None
+            cls.get_session_id()
+            response = cls.get_http_session().post(cls.base_url + route,
+                                                   **kwargs)
+        return response
+
     @classmethod
     def session_keepalive(cls):
         """
@@ -44,32 +215,38 @@ class CcureApi:
         Runs every minute in the scheduler.
         """
         keepalive_route = "/victorwebservice/api/v2/session/keepalive"
-        response = requests.post(
-            cls.base_url + keepalive_route,
-            headers={
-                "session-id": cls.get_session_id(),
-                "Access-Control-Expose-Headers": "session-id"
-            },
-            timeout=1
-        )
+        response = cls.post(keepalive_route)
         if response.status_code != status.HTTP_200_OK:
-            print("CCure keepalive error:", response.status_code, response.text)
+            logger.error("CCure keepalive error (%s): %s",
+                         response.status_code, response.text[:512])
             cls.logout()
 
     @classmethod
     def logout(cls):
         """Log out of the CCure session"""
+        if cls.session_id is None:  # then there's no session to end
+            return {"success": True}
         logout_route = "/victorwebservice/api/Authenticate/Logout"
-        response = requests.post(
-            cls.base_url + logout_route,
-            headers={"session-id": cls.get_session_id()},
-            timeout=1
-        )
-        cls.session_id = None
+        http_session = cls.get_http_session()
+        # the session-id header is already set on the shared session
+        response = http_session.post(cls.base_url + logout_route,
+                                     timeout=cls.timeout)
+        # clear the session under the lock, so it can't interleave with
+        # another thread setting a new session id and header
+        with cls.session_lock:
+            cls.session_id = None
+            http_session.headers.pop("session-id", None)
         if response.status_code == 200:
             return {"success": True}
         return {"success": False}
 
+    @classmethod
+    def close(cls):
+        """Close the shared session's pooled connections to CCure"""
+        if cls.http_session is not None:
+            cls.http_session.close()
+            cls.http_session = None
+
     @classmethod
     def get_campus_id_by_email(cls, email) -> str:
         """
@@ -78,24 +255,23 @@ class CcureApi:
         Parameters:
             email: The individual's email address
         """
+        with cls.cache_lock:
+            campus_id = cls.campus_ids_by_email.get(email)
+        if campus_id is not None:
+            return campus_id
         route = "/victorwebservice/api/Objects/FindObjsWithCriteriaFilter"
-        url = cls.base_url + route
         request_json = {
             "TypeFullName": "Personnel",
-            "WhereClause": f"Text14 = '{email}'"
+            "WhereClause": f"Text14 = '{escape_literal(email)}'"
         }
-        response = requests.post(
-            url,
-            json=request_json,
-            headers={
-                "session-id": cls.get_session_id(),
-                "Access-Control-Expose-Headers": "session-id"
-            },
-            timeout=1
-        )
+        response = cls.post(route, json=request_json)
         if response.status_code == status.HTTP_200_OK:
             if (json := response.json()):
-                return json[0].get("Text1", "")
+                campus_id = json[0].get("Text1", "")
+                if campus_id:
+                    with cls.cache_lock:
+                        cls.campus_ids_by_email[email] = campus_id
+                return campus_id
         return ""
 
     @classmethod
@@ -106,23 +282,22 @@ class CcureApi:
         Parameters:
             campus_id: The person's campus ID
         """
+        with cls.cache_lock:
+            object_id = cls.person_object_ids.get(campus_id)
+        if object_id is not None:
+            return object_id
         route = "/victorwebservice/api/Objects/FindObjsWithCriteriaFilter"
-        url = cls.base_url + route
         request_json = {
             "TypeFullName": "Personnel",
-            "WhereClause": f"Text1 = '{campus_id}'"
+            "WhereClause": f"Text1 = '{escape_literal(campus_id)}'"
         }
-        response = requests.post(
-            url,
-            json=request_json,
-            headers={
-                "session-id": cls.get_session_id(),
-                "Access-Control-Expose-Headers": "session-id"
-            },
-            timeout=1
-        )
+        response = cls.post(route, json=request_json)
         if response.status_code == status.HTTP_200_OK:
-            return response.json()[0].get("ObjectID", 0)
+            object_id = response.json()[0].get("ObjectID", 0)
+            if object_id:
+                with cls.cache_lock:
+                    cls.person_object_ids[campus_id] = object_id
+            return object_id
         return 0
 
     @classmethod
@@ -135,28 +310,44 @@ class CcureApi:
 
         Returns: dict in the format {campus_id: ccure_id}
         """
-        if not campus_ids:
-            return {}
+        with cls.cache_lock:
+            object_ids = {campus_id: cls.person_object_ids[campus_id]
+                          for campus_id in campus_ids
+                          if campus_id in cls.person_object_ids}
+        missing_ids = set(campus_ids) - object_ids.keys()
+        if not missing_ids:
+            return object_ids
+        # look up each batch of IDs concurrently
+        with ThreadPoolExecutor(max_workers=cls.max_workers) as executor:
+            for new_ids in executor.map(
+                    cls.find_person_object_ids,
+                    batched(missing_ids, cls.lookup_batch_size)):
+                object_ids.update(new_ids)
+        return object_ids
+
+    @classmethod
+    def find_person_object_ids(cls, campus_ids: list[str]) -> dict:
+        """
+        Look up one batch of people's CCure IDs, skipping the cache
+
+        Parameters:
+            campus_ids: the IDs of the people to include
+
+        Returns: dict in the format {campus_id: ccure_id}
+        """
         route = "/victorwebservice/api/Objects/FindObjsWithCriteriaFilter"
-        url = cls.base_url + route
         request_json = {
             "TypeFullName": "Personnel",
-            "WhereClause": " OR ".join(f"Text1 = '{campus_id}'"
-                                       for campus_id in campus_ids)
+            "WhereClause": in_clause("Text1", campus_ids)
         }
-        response = requests.post(
-            url,
-            json=request_json,
-            headers={
-                "session-id": cls.get_session_id(),
-                "Access-Control-Expose-Headers": "session-id"
-            },
-            timeout=1
-        )
-        if response.status_code == status.HTTP_200_OK:
-            return {person["Text1"]: person["ObjectID"]
-                    for person in response.json()}
-        return {}
+        response = cls.post(route, json=request_json)
+        if response.status_code != status.HTTP_200_OK:
+            return {}
+        new_ids = {person["Text1"]: person["ObjectID"]
+                   for person in response.json()}
+        with cls.cache_lock:
+            cls.person_object_ids.update(new_ids)
+        return new_ids
 
     @classmethod
     def get_person_by_campus_id(cls, campus_id: str) -> dict:
@@ -168,27 +359,30 @@ class CcureApi:
 
         Returns: a dict with the person's details in CCure
         """
-        query_route = "/victorwebservice/api/Objects/FindObjsWithCriteriaFilter"
-        url = cls.base_url + query_route
-
+        with cls.cache_lock:
+            person = cls.person_records.get(campus_id)
+        if person is not None:
+            return person
+        route = "/victorwebservice/api/Objects/FindObjsWithCriteriaFilter"
         request_json = {
             "TypeFullName": "Personnel",
-            "WhereClause": f"Text1 = '{campus_id}'"
+            "WhereClause": f"Text1 = '{escape_literal(campus_id)}'"
         }
-        response = requests.post(
-            url,
-            json=request_json,
-            headers={
-                "session-id": cls.get_session_id(),
-                "Access-Control-Expose-Headers": "session-id"
-            },
-            timeout=1
-        )
+        response = cls.post(route, json=request_json)
         if response.status_code == status.HTTP_200_OK:
-            return response.json()[0]
-        print(response.text)
+            person = response.json()[0]
+            with cls.cache_lock:
+                cls.person_records[campus_id] = person
+            return person
+        logger.warning("CCure non-200 (%s): %s",
+                       response.status_code, response.text[:512])
         return {}
 
+    @staticmethod
+    def is_campus_id(term: str) -> bool:
+        """Whether a search term is a complete, 9 digit campus ID"""
+        return len(term) == 9 and term.isdigit()
+
     @classmethod
     def search_people(cls, search: str) -> list[dict]:
         """
@@ -200,31 +394,30 @@ class CcureApi:
 
         Returns: list of dicts with person records
         """
-        query_route = "/victorwebservice/api/Objects/FindObjsWithCriteriaFilter"
-        url = cls.base_url + query_route
-        search_terms = search.split()
-
-        term_queries = [
-            (f"(Text1 LIKE '%{term}%' OR "  # campus_id
-             f"Text14 LIKE '%{term}%')")  # email
-            for term in search_terms
-        ]
+        route = "/victorwebservice/api/Objects/FindObjsWithCriteriaFilter"
+        search_terms = [escape_literal(term) for term in search.split()]
+
+        if len(search_terms) == 1 and cls.is_campus_id(search_terms[0]):
+            # a complete campus ID can only match itself, so skip the
+            # LIKE scan and let CCure look it up directly
+            where_clause = f"Text1 = '{search_terms[0]}'"
+        else:
+            where_clause = " AND ".join(
+                (f"(Text1 LIKE '%{term}%' OR "  # campus_id
+                 f"Text14 LIKE '%{term}%')")  # email
+                for term in search_terms
+            )
         request_json = {
             "TypeFullName": "Personnel",
-            "WhereClause": " AND ".join(term_queries)
+            "WhereClause": where_clause,
+            "PageSize": cls.search_page_size,
+            "PageNumber": 1
         }
-        response = requests.post(
-            url,
-            json=request_json,
-            headers={
-                "session-id": CcureApi.get_session_id(),
-                "Access-Control-Expose-Headers": "session-id"
-            },
-            timeout=1
-        )
+        response = cls.post(route, json=request_json)
         if response.status_code == status.HTTP_200_OK:
             return response.json()
-        print(response.text)
+        logger.warning("CCure non-200 (%s): %s",
+                       response.status_code, response.text[:512])
         return []
 
 
@@ -239,88 +432,46 @@ class CcureApi:
         Returns: list of dicts with data from all matching clearances
         """
         route = "/victorwebservice/api/v2/Personnel/ClearancesForAssignment"
-        url = cls.base_url + route
-        request_json = {
-            "partitionList": [],
-            "whereClause": f"Name LIKE '%{query}%'",
-            "pageSize": 0,
-            "pageNumber": 1,
-            "sortColumnName": "",
-            "whereArgList": [],
-            "propertyList": ["Name"],
-            "explicitPropertyList": []
-        }
-        response = requests.post(
-            url,
-            json=request_json,
-            headers={
-                "session-id": cls.get_session_id(),
-                "Access-Control-Expose-Headers": "session-id"
-            },
-            timeout=1
-        )
-        if response.status_code == status.HTTP_200_OK:
-            return response.json()[1:]
-        print(response.text)
-        return []
+        clearances = []
+        # a short query can match every clearance, so fetch them a page at
+        # a time instead of in one unbounded response
+        for page_number in count(1):
+            request_json = {
+                **cls.clearance_query,
+                "whereClause": f"Name LIKE '%{escape_literal(query)}%'",
+                "pageSize": cls.clearance_page_size,
+                "pageNumber": page_number
+            }
+            response = cls.post(route, json=request_json)
+            if response.status_code != status.HTTP_200_OK:
+                logger.warning("CCure non-200 (%s): %s",
+                               response.status_code, response.text[:512])
+                break
+            page = response.json()[1:]
+            clearances.extend(page)
+            if len(page) < cls.clearance_page_size:  # then it's the last page
+                break
+        return clearances
 
     @classmethod
-    def get_assigned_clearances(cls, assignee_id: int) -> int:
+    def get_assigned_clearances(cls, assignee_id: int) -> requests.Response:
         """
         With a person's CCure ObjectID, get the clearances assigned to them
 
         Parameters:
             assignee_id: the person's ID in CCure
+
+        Returns: the CCure response, whose records only include ClearanceID
         """
         route = "/victorwebservice/api/Objects/GetAllWithCriteria"
-        url = cls.base_url + route
         request_json = {
             "TypeFullName": ("SoftwareHouse.NextGen.Common.SecurityObjects."
                              "PersonnelClearancePairTimed"),
-            "WhereClause": f"PersonnelID = {assignee_id}"
+            "WhereClause": f"PersonnelID = {assignee_id}",
+            "PageSize": 0,
+            "PropertyList": ["ClearanceID"]
         }
-        return requests.post(
-            url,
-            json=request_json,
-            headers={
-                "session-id": cls.get_session_id(),
-                "Access-Control-Expose-Headers": "session-id"
-            },
-            timeout=1
-        )
-
-    @classmethod
-    def get_clearance_by_guid(cls, clearance_guid: str) -> dict:
-        """
-        Get a clearance object from CCure matching the given clearance_guid
-
-        Parameters:
-            clearance_guid: the GUID value of the clearance object
-        """
-        route = "/victorwebservice/api/v2/Personnel/ClearancesForAssignment"
-        url = cls.base_url + route
-        request_json = {
-            "partitionList": [],
-            "whereClause": f"GUID = '{clearance_guid}'",
-            "pageSize": 0,
-            "pageNumber": 1,
-            "sortColumnName": "",
-            "whereArgList": [],
-            "propertyList": ["Name"],
-            "explicitPropertyList": []
-        }
-        response = requests.post(
-            url,
-            json=request_json,
-            headers={
-                "session-id": cls.get_session_id(),
-                "Access-Control-Expose-Headers": "session-id"
-            },
-            timeout=1
-        )
-        if response.status_code == status.HTTP_200_OK and response.json():
-            return response.json()[1]
-        return {}
+        return cls.post(route, json=request_json)
 
     @classmethod
     def get_clearances_by_guid(cls, clearance_guids: list[str]) -> list[dict]:
@@ -331,30 +482,20 @@ class CcureApi:
             clearance_guids: the GUID values of the clearance objects
         """
         route = "/victorwebservice/api/v2/Personnel/ClearancesForAssignment"
-        url = cls.base_url + route
-        request_json = {
-            "partitionList": [],
-            "whereClause": " OR ".join(f"GUID = '{guid}'" for guid in clearance_guids),
-            "pageSize": 0,
-            "pageNumber": 1,
-            "sortColumnName": "",
-            "whereArgList": [],
-            "propertyList": ["Name"],
-            "explicitPropertyList": []
-        }
-        response = requests.post(
-            url,
-            json=request_json,
-            headers={
-                "session-id": cls.get_session_id(),
-                "Access-Control-Expose-Headers": "session-id"
-            },
-            timeout=1
-        )
-        if response.status_code == status.HTTP_200_OK and response.json():
-            return response.json()[1:]
-        print(response.text)
-        return []
+        clearances = []
+        for batch in batched(clearance_guids, cls.lookup_batch_size):
+            request_json = {
+                **cls.clearance_query,
+                "whereClause": in_clause("GUID", batch)
+            }
+            response = cls.post(route, json=request_json)
+            if response.status_code == status.HTTP_200_OK and (
+                    json := response.json()):
+                clearances.extend(json[1:])
+            else:
+                logger.warning("CCure non-200 (%s): %s",
+                               response.status_code, response.text[:512])
+        return clearances
 
     @classmethod
     def get_clearances_by_id(cls, clearance_ids: list[int]) -> list[dict]:
@@ -365,27 +506,20 @@ class CcureApi:
             clearance_ids: IDs for all the clearances to retrieve
         """
         route = "/victorwebservice/api/v2/Personnel/ClearancesForAssignment"
-        query = " OR ".join(f"ObjectID = {_id}" for _id in clearance_ids)
-        request_json = {
-            "partitionList": [],
-            "whereClause": query,
-            "pageSize": 0,
-            "pageNumber": 1,
-            "sortColumnName": "",
-            "whereArgList": [],
-            "propertyList": ["Name"],
-            "explicitPropertyList": []
-        }
-        response = requests.post(
-            cls.base_url + route,
-            json=request_json,
-            headers={
-                "session-id": cls.get_session_id(),
-                "Access-Control-Expose-Headers": "session-id"
-            },
-            timeout=1
-        )
-        return response.json()[1:]
+        clearances = []
+        for batch in batched(clearance_ids, cls.lookup_batch_size):
+            request_json = {
+                **cls.clearance_query,
+                "whereClause": in_clause("ObjectID", batch)
+            }
+            response = cls.post(route, json=request_json)
+            if response.status_code == status.HTTP_200_OK and (
+                    json := response.json()):
+                clearances.extend(json[1:])
+            else:
+                logger.warning("CCure non-200 (%s): %s",
+                               response.status_code, response.text[:512])
+        return clearances
 
     @classmethod
     def get_clearance_id(cls, clearance_guid: str) -> int:
@@ -395,8 +529,24 @@ class CcureApi:
         Parameters:
             clearance_guid: the clearance's GUID value in CCure
         """
-        clearance = cls.get_clearance_by_guid(clearance_guid)
-        return clearance.get("ObjectID", 0)
+        return cls.get_clearance_ids({clearance_guid}).get(clearance_guid, 0)
+
+    @classmethod
+    def get_clearance_ids(cls, clearance_guids: set[str]) -> dict:
+        """
+        Map clearance guids to their CCure ObjectIDs with one request.
+        Use this instead of calling get_clearance_id in a loop.
+
+        Parameters:
+            clearance_guids: the guids of the clearances to get IDs for
+
+        Returns: dict in the format {clearance_guid: clearance_id}
+        """
+        if not clearance_guids:
+            return {}
+        clearances_data = cls.get_clearance_data(clearance_guids)
+        return {guid: clearance["id"]
+                for guid, clearance in clearances_data.items()}
 
     @classmethod
     def get_clearance_data(cls, clearance_guids: set[str]) -> dict:
@@ -404,49 +554,79 @@ class CcureApi:
         Map clearance guids to their corresponding CCure IDs
         and clearance names
 
+        Parameters:
+            clearance_guids: the guids of the clearances to get data for
+
+        Returns: dict with clearance guids as keys
+        """
+        with cls.cache_lock:
+            clearances_data = {guid: cls.clearance_records[guid]
+                               for guid in clearance_guids
+                               if guid in cls.clearance_records}
+        missing_guids = set(clearance_guids) - clearances_data.keys()
+        if not missing_guids:
+            return clearances_data
+        # look up each batch of GUIDs concurrently
+        with ThreadPoolExecutor(max_workers=cls.max_workers) as executor:
+            for new_data in executor.map(
+                    cls.find_clearance_data,
+                    batched(missing_guids, cls.lookup_batch_size)):
+                clearances_data.update(new_data)
+        return clearances_data
+
+    @classmethod
+    def find_clearance_data(cls, clearance_guids: list[str]) -> dict:
+        """
+        Look up one batch of clearances' CCure IDs and names,
+        skipping the cache
+
         Parameters:
             clearance_guids: the guids of the clearances to get data for
 
         Returns: dict with clearance guids as keys
         """
         route = "/victorwebservice/api/v2/Personnel/ClearancesForAssignment"
-        url = cls.base_url + route
         request_json = {
-            "partitionList": [],
-            "whereClause": " OR ".join(f"GUID = '{clearance_guid}'"
-                                       for clearance_guid in clearance_guids),
-            "pageSize": 0,
-            "pageNumber": 1,
-            "sortColumnName": "",
-            "whereArgList": [],
-            "propertyList": ["Name"],
-            "explicitPropertyList": []
+            **cls.clearance_query,
+            "whereClause": in_clause("GUID", clearance_guids)
         }
-        response = requests.post(
-            url,
-            json=request_json,
-            headers={
-                "session-id": cls.get_session_id(),
-                "Access-Control-Expose-Headers": "session-id"
-            },
-            timeout=1
-        )
-        if response.status_code == status.HTTP_200_OK and response.json():
-            return {
-                clearance["GUID"]: {
-                    "id": clearance["ObjectID"],
-                    "name": clearance["Name"]
-                } for clearance in response.json()[1:]
-            }
-        return {}
+        response = cls.post(route, json=request_json)
+        if response.status_code != status.HTTP_200_OK or not (
+                json := response.json()):
+            return {}
+        new_data = {
+            clearance["GUID"]: {
+                "id": clearance["ObjectID"],
+                "name": clearance["Name"]
+            } for clearance in json[1:]
+        }
+        with cls.cache_lock:
+            cls.clearance_records.update(new_data)
+        return new_data
 
     @classmethod
     def get_clearance_name(cls, clearance_guid: str) -> str:
         """
-        With a clearance's guid, get its name in CCure
+        With a clearance's guid, get its name in CCure.
+        Use get_clearance_names instead of calling this in a loop.
         """
-        clearance = cls.get_clearance_by_guid(clearance_guid)
-        return clearance.get("Name", "")
+        return cls.get_clearance_names({clearance_guid}).get(clearance_guid, "")
+
+    @classmethod
+    def get_clearance_names(cls, clearance_guids: set[str]) -> dict:
+        """
+        Map clearance guids to their names in CCure with one request
+
+        Parameters:
+            clearance_guids: the guids of the clearances to get names for
+
+        Returns: dict in the format {clearance_guid: clearance_name}
+        """
+        if not clearance_guids:
+            return {}
+        clearances_data = cls.get_clearance_data(clearance_guids)
+        return {guid: clearance["name"]
+                for guid, clearance in clearances_data.items()}
 
     class AssignRevokeConfig(BaseModel):
         """For CCure assign_clearances and revoke_clearances methods"""
@@ -464,53 +644,74 @@ class CcureApi:
         Parameters:
             config: list of dicts with the data needed to assign the clearance
         """
-        campus_ids = set()
-        clearance_guids = set()
-        for item in config:
-            campus_ids.add(item.get("assignee_id"))
-            clearance_guids.add(item.get("clearance_guid"))
-        # then get ccure ids for assignee_ids and clearance_guids
-        assignee_ids = cls.get_person_object_ids(campus_ids)
-        clearances_data = cls.get_clearance_data(clearance_guids)
-        # group assignments requests by assignee
-        person_assignments = {assignee_id: []
-                              for assignee_id in assignee_ids.values()}
+        campus_ids = {item["assignee_id"] for item in config}
+        clearance_guids = {item["clearance_guid"] for item in config}
+        # then get ccure ids for assignee_ids and clearance_guids, which
+        # don't depend on each other, so look them up concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            assignee_ids_future = executor.submit(cls.get_person_object_ids,
+                                                  campus_ids)
+            clearances_data_future = executor.submit(cls.get_clearance_data,
+                                                     clearance_guids)
+        assignee_ids = assignee_ids_future.result()
+        clearances_data = clearances_data_future.result()
+        # group assignment requests by assignee, skipping anyone or any
+        # clearance CCure doesn't know about
+        person_assignments = defaultdict(list)
         for assignment in config:
-            assignee_id = assignee_ids[assignment["assignee_id"]]
-            clearances = person_assignments[assignee_id]
-            ccure_id = clearances_data[assignment["clearance_guid"]]
-            if ccure_id:
-                clearances.append(ccure_id)
-
-        for assignee, clearances in person_assignments.items():
-            # assign the assignee their new clearances
-            data = {
-                "type": ("SoftwareHouse.NextGen.Common"
-                         ".SecurityObjects.Personnel"),
-                "ID": assignee,
-                "Children": [{
-                    "Type": ("SoftwareHouse.NextGen.Common"
-                             ".SecurityObjects.PersonnelClearancePair"),
-                    "PropertyNames": ["PersonnelID", "ClearanceID"],
-                    "PropertyValues": [assignee, clearance["id"]]
-                } for clearance in clearances]
-            }
-            route = "/victorwebservice/api/Objects/PersistToContainer"
-            response = requests.post(
-                cls.base_url + route,
-                data=encode(data),
-                headers={
-                    "session-id": cls.get_session_id(),
-                    "Access-Control-Expose-Headers": "session-id",
-                    "Content-Type": "application/x-www-form-urlencoded"
-                },
-                timeout=1
-            )
-            if response.status_code != status.HTTP_200_OK:
-                print(f"Unable to assign clearances to person {assignee}.")
-                print(f"{response.status_code}: {response.text}")
+            assignee_id = assignee_ids.get(assignment["assignee_id"])
+            clearance = clearances_data.get(assignment["clearance_guid"])
+            if assignee_id and clearance:
+                person_assignments[assignee_id].append(clearance)
+
+        # each person's clearances are added with their own request
+        with ThreadPoolExecutor(max_workers=cls.max_workers) as executor:
+            results = executor.map(cls.assign_person_clearances,
+                                   person_assignments.keys(),
+                                   person_assignments.values())
+            failures = [assignee for assignee, assigned
+                        in zip(person_assignments, results) if not assigned]
+        if failures:
+            logger.error("Unable to assign clearances to people: %s", failures)
         return clearances_data
 
+    @classmethod
+    def assign_person_clearances(cls,
+                                 assignee: int,
+                                 clearances: list[dict]) -> bool:
+        """
+        Add clearances to one person in CCure
+
+        Parameters:
+            assignee: the person's CCure ObjectID
+            clearances: the CCure IDs and names of the clearances to assign
+
+        Returns: whether CCure accepted the request
+        """
+        data = {
+            "type": ("SoftwareHouse.NextGen.Common"
+                     ".SecurityObjects.Personnel"),
+            "ID": assignee,
+            "Children": [{
+                "Type": ("SoftwareHouse.NextGen.Common"
+                         ".SecurityObjects.PersonnelClearancePair"),
+                "PropertyNames": cls.pair_property_names,
+                "PropertyValues": [assignee, clearance["id"]]
+            } for clearance in clearances]
+        }
+        route = "/victorwebservice/api/Objects/PersistToContainer"
+        response = cls.post(
+            route,
+            data=encode(data),
+            headers=cls.form_headers,
+            timeout=cls.bulk_timeout
+        )
+        if response.status_code != status.HTTP_200_OK:
+            logger.error("Unable to assign clearances to person %s. %s: %s",
+                         assignee, response.status_code, response.text[:512])
+            return False
+        return True
+
     @classmethod
     def revoke_clearances(cls, config: list[AssignRevokeConfig]):
         """
@@ -519,75 +720,127 @@ class CcureApi:
         Parameters:
             config: list of dicts with the data needed to revoke the clearance
         """
-        campus_ids = set()
-        clearance_guids = set()
-        for item in config:
-            campus_ids.add(item.get("assignee_id"))
-            clearance_guids.add(item.get("clearance_guid"))
-        # then get ccure ids for assignee_ids and clearance_guids
-        assignee_ids = cls.get_person_object_ids(campus_ids)
-        clearances_data = cls.get_clearance_data(clearance_guids)
-
-        # group revoke requests by assignee
-        revocations = {item["assignee_id"]: [] for item in config}
+        campus_ids = {item["assignee_id"] for item in config}
+        clearance_guids = {item["clearance_guid"] for item in config}
+        # then get ccure ids for assignee_ids and clearance_guids, which
+        # don't depend on each other, so look them up concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            assignee_ids_future = executor.submit(cls.get_person_object_ids,
+                                                  campus_ids)
+            clearances_data_future = executor.submit(cls.get_clearance_data,
+                                                     clearance_guids)
+        assignee_ids = assignee_ids_future.result()
+        clearances_data = clearances_data_future.result()
+
+        # group revoke requests by assignee, skipping anyone or any
+        # clearance CCure doesn't know about
+        revocations = defaultdict(list)
         for revocation in config:
-            clearances = revocations[revocation["assignee_id"]]
-            ccure_id = clearances_data[revocation["clearance_guid"]]["id"]
-            if ccure_id:
-                clearances.append(ccure_id)
-        revocations = {assignee_ids[k]: v for k, v in revocations.items()}
-
-        for assignee, clearance_ids in revocations.items():
-            # get object IDs of the assignee's PersonnelClearancePair objects
-            clearance_query = " OR ".join(f"ClearanceID = {clearance_id}"
-                                          for clearance_id in clearance_ids)
-
-            route = "/victorwebservice/api/Objects/GetAllWithCriteria"
-            response = requests.post(
-                cls.base_url + route,
-                json={
-                    "TypeFullName": ("SoftwareHouse.NextGen.Common"
-                                     ".SecurityObjects.PersonnelClearancePair"),
-                    "WhereClause": (f"PersonnelID = {assignee} "
-                                    f"AND ({clearance_query})")
-                },
-                headers={
-                    "session-id": cls.get_session_id(),
-                    "Access-Control-Expose-Headers": "session-id"
-                },
-                timeout=1
-            )
-            if response.status_code != status.HTTP_200_OK:
-                print(f"Unable to revoke clearances from {assignee}.")
-                print(f"{response.status_code}: {response.text}")
-                return response
-
-            assignment_ids = [pair["ObjectID"] for pair in response.json()]
-
-            # delete the assignee's PersonnelClearancePair objects
-            data = {
-                "type": "SoftwareHouse.NextGen.Common"
-                        ".SecurityObjects.Personnel",
-                "ID": assignee,
-                "Children": [{
-                    "Type": ("SoftwareHouse.NextGen.Common"
-                             ".SecurityObjects.PersonnelClearancePair"),
-                    "ID": assignment_id
-                } for assignment_id in assignment_ids]
-            }
-            route = "/victorwebservice/api/Objects/RemoveFromContainer"
-            response = requests.post(
-                cls.base_url + route,
-                data=encode(data),
-                headers={
-                    "session-id": cls.get_session_id(),
-                    "Access-Control-Expose-Headers": "session-id",
-                    "Content-Type": "application/x-www-form-urlencoded"
-                },
-                timeout=1
-            )
-            if response.status_code != status.HTTP_200_OK:
-                print(f"Unable to revoke clearances from {assignee}.")
-                print(f"{response.status_code}: {response.text}")
-
+            assignee_id = assignee_ids.get(revocation["assignee_id"])
+            clearance = clearances_data.get(revocation["clearance_guid"])
+            if assignee_id and clearance:
+                revocations[assignee_id].append(clearance["id"])
+
+        if not revocations:  # then there's nothing to revoke
+            return clearances_data
+        # look up the PersonnelClearancePair objects a batch of people at once
+        batches = [{assignee: revocations[assignee] for assignee in batch}
+                   for batch in batched(revocations, cls.lookup_batch_size)]
+        pairs_by_assignee = {}
+        with ThreadPoolExecutor(max_workers=cls.max_workers) as executor:
+            for pairs in executor.map(cls.find_clearance_pairs, batches):
+                pairs_by_assignee.update(pairs)
+
+        # each person's clearances are removed with their own request
+        with ThreadPoolExecutor(max_workers=cls.max_workers) as executor:
+            results = executor.map(cls.revoke_person_clearances,
+                                   pairs_by_assignee.keys(),
+                                   pairs_by_assignee.values())
+            failures = [assignee for assignee, revoked
+                        in zip(pairs_by_assignee, results) if not revoked]
+        if failures:
+            logger.error("Unable to revoke clearances from people: %s",
+                         failures)
         return clearances_data
+
+    @classmethod
+    def find_clearance_pairs(cls, revocations: dict) -> dict:
+        """
+        Look up one batch of people's PersonnelClearancePair objects
+
+        Parameters:
+            revocations: dict in the format {assignee: [clearance_ids]},
+                with the CCure IDs of the people and clearances to revoke
+
+        Returns: dict in the format {assignee: [pair ObjectIDs]}, leaving
+            out the batch if CCure couldn't be queried
+        """
+        clearance_ids = {clearance_id
+                         for clearance_ids in revocations.values()
+                         for clearance_id in clearance_ids}
+        route = "/victorwebservice/api/Objects/GetAllWithCriteria"
+        response = cls.post(
+            route,
+            json={
+                "TypeFullName": ("SoftwareHouse.NextGen.Common"
+                                 ".SecurityObjects.PersonnelClearancePair"),
+                "WhereClause": (in_clause("PersonnelID", revocations) + " AND "
+                                + in_clause("ClearanceID", clearance_ids)),
+                "PageSize": 0
+            },
+            timeout=cls.bulk_timeout
+        )
+        if response.status_code != status.HTTP_200_OK:
+            logger.error("Unable to look up clearances to revoke from %s. "
+                         "%s: %s", list(revocations), response.status_code,
+                         response.text[:512])
+            return {}
+        # the query covers every assignee/clearance combination, so only
+        # keep the pairs that were actually asked to be revoked
+        pairs_by_assignee = {assignee: [] for assignee in revocations}
+        for pair in response.json():
+            assignee = pair["PersonnelID"]
+            if pair["ClearanceID"] in revocations.get(assignee, ()):
+                pairs_by_assignee[assignee].append(pair["ObjectID"])
+        return pairs_by_assignee
+
+    @classmethod
+    def revoke_person_clearances(cls,
+                                 assignee: int,
+                                 assignment_ids: list[int]) -> bool:
+        """
+        Remove clearances from one person in CCure
+
+        Parameters:
+            assignee: the person's CCure ObjectID
+            assignment_ids: the ObjectIDs of the person's
+                PersonnelClearancePair objects to remove
+
+        Returns: whether the clearances are gone from CCure
+        """
+        if not assignment_ids:  # then the person doesn't have the clearances
+            return True
+
+        # delete the assignee's PersonnelClearancePair objects
+        data = {
+            "type": "SoftwareHouse.NextGen.Common"
+                    ".SecurityObjects.Personnel",
+            "ID": assignee,
+            "Children": [{
+                "Type": ("SoftwareHouse.NextGen.Common"
+                         ".SecurityObjects.PersonnelClearancePair"),
+                "ID": assignment_id
+            } for assignment_id in assignment_ids]
+        }
+        route = "/victorwebservice/api/Objects/RemoveFromContainer"
+        response = cls.post(
+            route,
+            data=encode(data),
+            headers=cls.form_headers,
+            timeout=cls.bulk_timeout
+        )
+        if response.status_code != status.HTTP_200_OK:
+            logger.error("Unable to revoke clearances from %s. %s: %s",
+                         assignee, response.status_code, response.text[:512])
+            return False
+        return True
@@ -1,14 +1,60 @@
 """Manage the service's connection to the MongoDB datbase"""
 
 import os
-from pymongo import MongoClient
+import logging
+from functools import lru_cache
+from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
 
+logger = logging.getLogger(__name__)
 
-def get_clearance_collection(collection_name):
-    """Return a collection from the clearance database."""
+
+@lru_cache(maxsize=1)
+def get_client() -> MongoClient:
+    """
+    Return the MongoClient for the clearance database, created on first use.
+    Every collection shares it, and so shares one connection pool.
+    """
     client_url = os.getenv("CLEARANCE_DB_URL") or "mongodb://localhost:27017"
     if not client_url:
         raise ValueError('No "CLEARANCE_DB_URL" variable found')
-    client = MongoClient(client_url)
-    db = client["clearance_service"]
+    return MongoClient(client_url, appname="clearance-service")
+
+
+def get_clearance_collection(collection_name):
+    """Return a collection from the clearance database."""
+    db = get_client()["clearance_service"]
     return db[collection_name]
+
+
+def create_indexes():
+    """Create the indexes that the service's queries rely on"""
+    audit_collection = get_clearance_collection("audit")
+    audit_collection.create_index([("timestamp", DESCENDING)])
+    audit_collection.create_index([("assignee_id", ASCENDING),
+                                   ("timestamp", DESCENDING)])
+
+    # the scheduler's per-category $match stages filter on state plus
+    # end/start times; revoke requests delete by state and assignment
+    assignment_collection = get_clearance_collection("clearance_assignment")
+    assignment_collection.create_index([("state", ASCENDING),
+                                        ("end_time", ASCENDING),
+                                        ("start_time", ASCENDING)])
+    assignment_collection.create_index([("state", ASCENDING),
+                                        ("assignee_id", ASCENDING),
+                                        ("clearance_id", ASCENDING),
+                                        ("submitted_time", ASCENDING)])
+
+    liaison_permissions_collection = get_clearance_collection(
+        "liaison-clearance-permissions")
+    # one record per liaison, so upserts can't race into duplicates.
+    # existing duplicates have to be merged first (see the README), and
+    # until then the service runs without the index
+    try:
+        liaison_permissions_collection.create_index(
+            [("campus_id", ASCENDING)], unique=True)
+    except DuplicateKeyError as err:
+        logger.error("Unable to create the unique campus_id index on "
+                     "liaison-clearance-permissions, merge the duplicate "
+                     "records first: %s", err)
+    liaison_permissions_collection.create_index([("email", ASCENDING)])
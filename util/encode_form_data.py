@@ -1,5 +1,8 @@
 """Tool to encode form data"""
 
+from urllib.parse import urlencode
+
+
 def encode(data: dict) -> str:
     """
     Encode a dict of form data as a string
@@ -9,33 +12,23 @@ def encode(data: dict) -> str:
 
     Returns: the string of encoded data
     """
-    def get_form_entries(data: dict, prefix: str = "") -> list[str]:
-        """
-        Convert the data dict into a list of form entries
-
-        Parameters:
-            data: data about the new clearance assignment
-
-        Returns: list of strings representing key/value pairs
-        """
-        entries = []
-        for key, val in data.items():
-            if isinstance(val, (int, str)):
-                if prefix:
-                    entries.append(f"{prefix}[{key}]={val}")
+    entries = []
+    # form fields still to be flattened, next one last, so entries come out
+    # depth first in the same order as the data
+    pending = list(reversed(data.items()))
+    while pending:
+        name, val = pending.pop()
+        if isinstance(val, (int, str)):
+            entries.append((name, val))
+        elif isinstance(val, list):
+            fields = []
+            for i, list_item in enumerate(val):
+                if isinstance(list_item, dict):
+                    fields.extend((f"{name}[{i}][{key}]", item_val)
+                                  for key, item_val in list_item.items())
                 else:
-                    entries.append(f"{key}={val}")
-            elif isinstance(val, list):
-                for i, list_item in enumerate(val):
-                    if isinstance(list_item, dict):
-                        entries.extend(get_form_entries(
-                            data=list_item,
-                            prefix=prefix + f"{key}[{i}]"
-                        ))
-                    elif prefix:
-                        entries.append(f"{prefix}[{key}][]={list_item}")
-                    else:
-                        entries.append(f"{key}[]={list_item}")
-        return entries
+                    fields.append((f"{name}[]", list_item))
+            pending.extend(reversed(fields))
 
-    return "&".join(get_form_entries(data))
+    # CCure reads the field names with their brackets as they are
+    return urlencode(entries, safe="[]")